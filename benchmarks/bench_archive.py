@@ -0,0 +1,104 @@
+# benchmarks/bench_archive.py
+#
+# Compare the folder backend with the single-file archive:
+#   python benchmarks/bench_archive.py [recipe count]
+
+import os
+import sys
+import time
+import random
+import tempfile
+
+from corpus import make_synthetic_corpus, make_recipe_fields, percentile
+
+import recipe_manager
+import recipe_archive
+
+
+def folder_size(folder):
+    total = 0
+    for root, _dirs, files in os.walk(folder):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def report(label, seconds, count, size_bytes):
+    print(
+        f"{label:<28} {seconds * 1000:9.1f} ms  "
+        f"{count / seconds:10.0f} recipes/s  {size_bytes / seconds / 1e6:8.1f} MB/s"
+    )
+
+
+def report_latency(label, samples):
+    print(
+        f"{label:<28} p50 {percentile(samples, 50) * 1e6:8.1f} us  "
+        f"p99 {percentile(samples, 99) * 1e6:8.1f} us"
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = make_synthetic_corpus(os.path.join(tmp, "recipes"), count)
+        archive_path = os.path.join(tmp, "recipes.ambr")
+        archive = recipe_archive.open_archive(archive_path)
+        archive.import_from_folder(folder)
+        print(f"{count} recipes, folder {folder_size(folder) / 1e6:.1f} MB, "
+              f"archive {os.path.getsize(archive_path) / 1e6:.1f} MB\n")
+
+        # Full catalog load
+        start = time.perf_counter()
+        recipes = recipe_manager.load_recipes(folder)
+        report("load_recipes (folder)", time.perf_counter() - start, len(recipes), folder_size(folder))
+
+        start = time.perf_counter()
+        recipes = archive.recipes()
+        report("load_recipes (archive)", time.perf_counter() - start, len(recipes),
+               os.path.getsize(archive_path))
+
+        # Random single-recipe reads
+        file_paths = [os.path.join(folder, n) for n in os.listdir(folder)]
+        keys = archive.keys()
+        samples = []
+        for path in rng.sample(file_paths, min(2000, len(file_paths))):
+            start = time.perf_counter()
+            recipe_manager.parse_recipe_file(path)
+            samples.append(time.perf_counter() - start)
+        report_latency("\nread one (folder)", samples)
+        samples = []
+        for key in rng.sample(keys, min(2000, len(keys))):
+            start = time.perf_counter()
+            archive.get_recipe(key)
+            samples.append(time.perf_counter() - start)
+        report_latency("read one (archive)", samples)
+
+        # Writes
+        for label, target in (("add_recipe (folder)", folder), ("add_recipe (archive)", archive_path)):
+            samples = []
+            for i in range(500):
+                title, description, ingredients, steps, tags = make_recipe_fields(rng, count + i)
+                start = time.perf_counter()
+                recipe_manager.add_recipe(title, description.ljust(30, "."), ingredients, steps,
+                                          tags, recipe_folder=target)
+                samples.append(time.perf_counter() - start)
+            report_latency(label, samples)
+
+        # Compaction after overwriting half the catalog
+        for key in keys[: len(keys) // 2]:
+            view = archive.get_bytes(key)
+            with view:
+                text = str(view, "utf-8")
+            archive.put(key, text)
+        before = os.path.getsize(archive_path)
+        start = time.perf_counter()
+        archive.compact()
+        print(f"\ncompact: {before / 1e6:.1f} MB -> {os.path.getsize(archive_path) / 1e6:.1f} MB "
+              f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_bulk.py
+#
+# Retag and delete a selection of recipes one at a time (write + full reload
+# per recipe, as the context menu used to) versus as one batch:
+#   python benchmarks/bench_bulk.py [library size] [selection size]
+
+import sys
+import time
+import tempfile
+
+from corpus import make_synthetic_corpus
+
+import catalog
+import recipe_manager
+
+
+def one_at_a_time(recipe_folder, recipes):
+    start = time.perf_counter()
+    for recipe in recipes:
+        recipe_manager.update_recipe(
+            recipe, recipe.title, recipe.description, recipe.ingredients, recipe.steps,
+            recipe.tags + ["bulk"]
+        )
+        recipe_manager.load_recipes(recipe_folder)
+    retag = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for recipe in recipes:
+        recipe_manager.delete_recipe(recipe)
+        recipe_manager.load_recipes(recipe_folder)
+    return retag, time.perf_counter() - start
+
+
+def batched(recipe_folder, count):
+    lib = catalog.Catalog(recipe_folder)
+    lib.load()
+    recipes = lib.snapshot.recipe_list()[:count]
+
+    start = time.perf_counter()
+    journal = lib.bulk_retag(recipes, add_tags=["bulk"])
+    retag = time.perf_counter() - start
+    assert not journal.failed and len(journal) == len(recipes)
+
+    start = time.perf_counter()
+    journal = lib.bulk_delete(lib.snapshot.recipe_list()[:count])
+    delete = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lib.undo_batch(journal)
+    undo = time.perf_counter() - start
+
+    fresh = catalog.Catalog(recipe_folder)
+    fresh.load()
+    assert set(fresh.snapshot.recipes) == set(lib.snapshot.recipes)
+    return retag, delete, undo
+
+
+def main():
+    library = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    selection = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    with tempfile.TemporaryDirectory() as tmp:
+        make_synthetic_corpus(tmp, library)
+        recipes = recipe_manager.load_recipes(tmp)[:selection]
+        retag, delete = one_at_a_time(tmp, recipes)
+    print(f"one at a time: retag {selection} in {retag:7.2f} s, delete in {delete:7.2f} s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        make_synthetic_corpus(tmp, library)
+        retag, delete, undo = batched(tmp, selection)
+    print(f"batch:         retag {selection} in {retag:7.2f} s, delete in {delete:7.2f} s, undo in {undo:.2f} s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
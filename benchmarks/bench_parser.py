@@ -0,0 +1,200 @@
+# benchmarks/bench_parser.py
+#
+# Differential test and throughput of recipe_manager.parse_recipe_bytes
+# against the previous line/str parser (kept below as legacy_parse):
+#   python benchmarks/bench_parser.py [corpus size]
+#
+# Every synthetic recipe, plus CRLF, indented and non-ASCII variants of it,
+# must parse to the same fields with both parsers. The known fixes (slicing
+# instead of replace) are listed separately.
+
+import os
+import sys
+import time
+import random
+import tempfile
+
+from corpus import make_synthetic_corpus
+
+import recipe_manager
+
+FIELDS = ("title", "description", "ingredients", "steps", "tags", "is_valid")
+
+
+def legacy_parse(lines):
+    """The parser before the byte-level rewrite, verbatim."""
+    title = ""
+    description = ""
+    tags = []
+    ingredients = []
+    steps = []
+    mode = None
+    is_valid = True
+
+    for line in lines:
+        line_stripped = line.strip()
+
+        if line_stripped.startswith("Title:"):
+            title = line_stripped.replace("Title:", "").strip()
+            continue
+
+        if line_stripped.startswith("Description:"):
+            description = line_stripped.replace("Description:", "").strip()
+            continue
+
+        if line_stripped.startswith("Tags:"):
+            tags_part = line_stripped.replace("Tags:", "").strip()
+            tags = [tag.strip().lower() for tag in tags_part.split(',') if tag.strip()]
+            continue
+
+        if line_stripped.startswith("Ingredients:"):
+            mode = "ingredients"
+            continue
+
+        if line_stripped.startswith("Steps:"):
+            mode = "steps"
+            continue
+
+        if mode == "ingredients" and line_stripped.startswith("- "):
+            ingredient_line = line_stripped.replace("- ", "").strip()
+            if ingredient_line:
+                ingredients.append(ingredient_line)
+            continue
+
+        if mode == "steps" and line_stripped:
+            steps.append(line_stripped)
+            continue
+
+    if not title or not description:
+        is_valid = False
+    if len(description) < 30:
+        is_valid = False
+    if not steps:
+        is_valid = False
+
+    return recipe_manager.Recipe(title, description, ingredients, steps, tags, is_valid=is_valid)
+
+
+def legacy_parse_bytes(data):
+    # What parse_recipe_file did: universal-newline text read, then readlines()
+    return legacy_parse(data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n").splitlines(True))
+
+
+def variants(data, rng):
+    """The file as written, plus CRLF, indented, padded and non-ASCII variants."""
+    yield data
+    yield data.replace(b"\n", b"\r\n")
+    yield data.replace(b"\n", b"\r")
+    lines = data.split(b"\n")
+    yield b"\n".join(b"  \t" + line + b"   " for line in lines)
+    yield b"\n".join(line.replace(b"e", "é".encode()).replace(b"o", "ø".encode()) for line in lines)
+    yield b"\n".join(" ".encode() + line + "　".encode() for line in lines)
+    shuffled = lines[:]
+    rng.shuffle(shuffled)
+    yield b"\n".join(shuffled)
+    yield b"Notes: first draft\n\n" + data + b"\n- stray\nTitle:\n"
+
+
+# Inputs where the old parser was wrong; the new one slices the prefix off
+KNOWN_FIXES = [
+    b"Title: Salt-free pancakes\nIngredients:\n- 1 cup flour - sifted\n",
+    b"Title: The Title: A Sequel\n",
+    b"Tags: Tags: vegan, quick\n",
+]
+
+
+def differential(blobs):
+    checked = mismatches = 0
+    rng = random.Random(7)
+    for data in blobs:
+        for variant in variants(data, rng):
+            checked += 1
+            old = legacy_parse_bytes(variant)
+            new = recipe_manager.parse_recipe_bytes(variant)
+            diff = [f for f in FIELDS if getattr(old, f) != getattr(new, f)]
+            if diff:
+                mismatches += 1
+                if mismatches <= 5:
+                    print(f"  MISMATCH {diff}: {variant[:80]!r}")
+                    for f in diff:
+                        print(f"    legacy {f}={getattr(old, f)!r}\n    new    {f}={getattr(new, f)!r}")
+    return checked, mismatches
+
+
+def strict_checks(blobs):
+    for data in blobs[:200]:
+        recipe_manager.parse_recipe_bytes(data, strict=True)
+    rejected = 0
+    bad_inputs = [
+        b"Title: x\nDescription: y\nIngredients:\nflour\n",
+        b"Title: x\nTitle: y\n",
+        b"hello\nTitle: x\n",
+        b"Title: caf\xe9\n",
+    ]
+    for data in bad_inputs:
+        try:
+            recipe_manager.parse_recipe_bytes(data, strict=True)
+        except recipe_manager.RecipeFormatError as e:
+            rejected += 1
+            print(f"  strict rejects {data[:30]!r}: {e}")
+    return rejected == len(bad_inputs)
+
+
+def throughput(parsers, inputs, rounds=15):
+    """Best time of each parser over `inputs`; rounds alternate between parsers so load spikes hit both."""
+    best = {label: None for label, _ in parsers}
+    for _ in range(rounds):
+        for label, parse in parsers:
+            start = time.perf_counter()
+            for item in inputs:
+                parse(item)
+            elapsed = time.perf_counter() - start
+            if best[label] is None or elapsed < best[label]:
+                best[label] = elapsed
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = make_synthetic_corpus(os.path.join(tmp, "recipes"), count)
+        paths = sorted(os.path.join(folder, name) for name in os.listdir(folder))
+        blobs = []
+        for path in paths:
+            with open(path, "rb") as f:
+                blobs.append(f.read())
+        total_bytes = sum(len(data) for data in blobs)
+        print(f"{len(blobs)} recipes, {total_bytes / 1e6:.2f} MB")
+
+        checked, mismatches = differential(blobs)
+        print(f"differential: {checked} inputs, {mismatches} mismatches")
+
+        print("known fixes (legacy -> new):")
+        for data in KNOWN_FIXES:
+            old = legacy_parse_bytes(data)
+            new = recipe_manager.parse_recipe_bytes(data)
+            for f in FIELDS:
+                if getattr(old, f) != getattr(new, f):
+                    print(f"  {f}: {getattr(old, f)!r} -> {getattr(new, f)!r}")
+
+        strict_ok = strict_checks(blobs)
+        print(f"strict mode: {'ok' if strict_ok else 'FAILED'}")
+
+        def legacy_file(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return legacy_parse(f.readlines())
+
+        for kind, inputs, parsers in (
+            ("parse", blobs, (("legacy", legacy_parse_bytes), ("new", recipe_manager.parse_recipe_bytes))),
+            ("file", paths, (("legacy", legacy_file), ("new", recipe_manager.parse_recipe_file))),
+        ):
+            best = throughput(parsers, inputs)
+            for label, _ in parsers:
+                print(f"{label:>7} {kind}: {total_bytes / best[label] / 1e6:7.1f} MB/s ({best[label] * 1000:.1f} ms)")
+            print(f"  speedup {kind}: {best['legacy'] / best['new']:.2f}x")
+
+    return 0 if mismatches == 0 and strict_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+# benchmarks/bench_query.py
+#
+# Check the query planner and the streaming pages against the linear scan in
+# recipe_manager.search_recipes and compare their cost on a large synthetic
+# library:
+#   python benchmarks/bench_query.py [recipe count]
+
+import sys
+import time
+import random
+
+from corpus import make_recipe_fields, WORDS, TAGS, INGREDIENTS
+
+import catalog
+import recipe_manager
+
+
+QUERIES = [
+    "",
+    "golden",
+    "fluffy+garlic",
+    "lemon, basil",
+    "golden pancake",
+    "milk+egg+butter",
+    "title:golden AND tag:vegan",
+    "tag:quick AND ingredient:olive oil AND NOT step:roasted",
+    "(tag:dinner OR tag:lunch) AND ingredient:rice AND NOT title:soup",
+    "title:(curry OR stew) AND description:spicy",
+    "NOT garlic AND tag:dessert",
+    "ingredient:cheddar cheese AND step:fresh AND title:tart",
+]
+
+
+def make_recipes(count, seed=3):
+    rng = random.Random(seed)
+    recipes = []
+    for i in range(count):
+        title, description, ingredients, steps, tags = make_recipe_fields(rng, i)
+        ingredients = [ing.replace(" ", "_") for ing in ingredients]
+        recipes.append(recipe_manager.Recipe(title, description, ingredients, steps, tags,
+                                             filename=f"recipes/synthetic_{i}.txt"))
+    return recipes
+
+
+def random_query(rng):
+    def term():
+        kind = rng.random()
+        if kind < 0.3:
+            return f"tag:{rng.choice(TAGS)}"
+        if kind < 0.5:
+            return f"ingredient:{rng.choice(INGREDIENTS).replace('_', ' ')}"
+        if kind < 0.7:
+            return f"title:{rng.choice(WORDS)}"
+        if kind < 0.8:
+            return f"step:{rng.choice(WORDS)}"
+        return rng.choice(WORDS)
+
+    def expr(depth):
+        if depth == 0 or rng.random() < 0.3:
+            return ("NOT " if rng.random() < 0.15 else "") + term()
+        op = rng.choice([" AND ", " OR "])
+        return "(" + op.join(expr(depth - 1) for _ in range(rng.randint(2, 3))) + ")"
+
+    return expr(3)
+
+
+def ids(recipes):
+    return {recipe_manager.recipe_id(r) for r in recipes}
+
+
+def differential(snapshot, recipe_list, queries):
+    mismatches = 0
+    for q in queries:
+        planned = ids(snapshot.search(q))
+        scanned = ids(recipe_manager.search_recipes(recipe_list, q))
+        if planned != scanned:
+            mismatches += 1
+            print(f"  MISMATCH {q!r}: planner {len(planned)} vs scan {len(scanned)}")
+    return mismatches
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    recipes = make_recipes(count)
+    snapshot = catalog.CatalogSnapshot.build("recipes", recipes)
+    recipe_list = snapshot.recipe_list()
+
+    start = time.perf_counter()
+    snapshot.term_index()
+    print(f"{count} recipes, term index built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    rng = random.Random(11)
+    queries = QUERIES + [random_query(rng) for _ in range(200)]
+    mismatches = differential(snapshot, recipe_list, queries)
+
+    # The incrementally maintained index must answer like a fresh one
+    changed = rng.sample(recipe_list, 50)
+    replacements = make_recipes(50, seed=5)
+    for old, new in zip(changed, replacements):
+        new.filename = old.filename
+    updated = snapshot.with_changes(replacements[:40], [recipe_manager.recipe_id(r) for r in changed[40:]])
+    rebuilt = catalog.CatalogSnapshot.build("recipes", updated.recipe_list())
+    for q in queries[:100]:
+        if ids(updated.search(q)) != ids(rebuilt.search(q)):
+            mismatches += 1
+            print(f"  MISMATCH after with_changes {q!r}")
+
+    # Streaming: pages must concatenate to the full result
+    for q in queries[:50]:
+        pages = [r for batch in snapshot.iter_search(q, batch_size=37) for r in batch]
+        window = [r for batch in snapshot.iter_search(q, batch_size=10, offset=5, limit=20) for r in batch]
+        full = snapshot.search(q)
+        if pages != full or window != full[5:25]:
+            mismatches += 1
+            print(f"  MISMATCH streaming {q!r}")
+    print(f"differential check: {len(queries)} queries, {mismatches} mismatch(es)\n")
+
+    print(f"{'query':<60} {'scan ms':>9} {'plan ms':>9} {'page 1 ms':>10} {'hits':>6}")
+    for q in QUERIES[1:]:
+        start = time.perf_counter()
+        scanned = recipe_manager.search_recipes(recipe_list, q)
+        scan_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        snapshot.search(q)
+        plan_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        next(snapshot.iter_search(q, batch_size=100), None)
+        page_ms = (time.perf_counter() - start) * 1000
+        print(f"{q[:60]:<60} {scan_ms:9.2f} {plan_ms:9.2f} {page_ms:10.2f} {len(scanned):6d}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+# benchmarks/bench_shopping_list.py
+#
+# Time shopping-list aggregation for large meal plans:
+#   python benchmarks/bench_shopping_list.py [recipe count]
+
+import sys
+import time
+import random
+from collections import defaultdict
+
+from corpus import make_recipe_fields
+
+import recipe_manager
+import shopping_list
+
+
+def make_recipes(count):
+    rng = random.Random(7)
+    recipes = []
+    for i in range(count):
+        title, description, ingredients, steps, tags = make_recipe_fields(rng, i)
+        # Recipe files store ingredients with underscores for spaces
+        ingredients = [ing.replace(" ", "_") for ing in ingredients]
+        recipes.append(recipe_manager.Recipe(title, description, ingredients, steps, tags))
+    return recipes
+
+
+def python_loop_shopping_list(recipes, scale):
+    """Reference implementation: parse and sum every line in plain Python."""
+    totals = defaultdict(float)
+    for recipe in recipes:
+        for line in recipe.ingredients:
+            amount, unit, name = shopping_list.parse_quantity(line)
+            base, factor = shopping_list.UNIT_ALIASES.get(unit, ("", 1.0))
+            if amount is not None:
+                totals[(name, base)] += amount * factor * scale
+            else:
+                totals[(name, base)] += 0.0
+    return totals
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    counts = [int(sys.argv[1])] if len(sys.argv) > 1 else [1000, 5000, 20000]
+    for count in counts:
+        recipes = make_recipes(count)
+        lines = sum(len(r.ingredients) for r in recipes)
+
+        _, loop_time = timed(python_loop_shopping_list, recipes, 2.0)
+        table, build_time = timed(shopping_list.IngredientTable, recipes)
+        items, sum_time = timed(table.shopping_list, scale=2.0)
+        per_recipe = [1.0 + (i % 4) for i in range(count)]
+        _, scaled_time = timed(table.shopping_list, scale=per_recipe)
+        subset = list(range(0, count, 3))
+        _, subset_time = timed(table.shopping_list, recipe_indices=subset)
+
+        print(f"{count} recipes, {lines} ingredient lines, {len(items)} list entries")
+        print(f"  python loop (parse + sum)       {loop_time * 1000:8.1f} ms")
+        print(f"  build columnar table            {build_time * 1000:8.1f} ms")
+        print(f"  group-by sum, uniform scale     {sum_time * 1000:8.1f} ms")
+        print(f"  group-by sum, per-recipe scale  {scaled_time * 1000:8.1f} ms")
+        print(f"  group-by sum, 1/3 of recipes    {subset_time * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
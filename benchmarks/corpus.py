@@ -0,0 +1,60 @@
+# benchmarks/corpus.py
+
+import os
+import sys
+import random
+
+# Let the benchmark scripts import the top-level modules when run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import recipe_manager
+
+WORDS = (
+    "fluffy crispy golden smoky tangy creamy spicy roasted fresh hearty "
+    "garlic lemon basil butter honey ginger chili tomato onion pepper "
+    "pancake omelette risotto curry salad soup stew tart pie sandwich"
+).split()
+TAGS = ["breakfast", "lunch", "dinner", "dessert", "appetizer", "cocktail", "vegan", "quick"]
+UNITS = ["", "g", "kg", "ml", "l", "cup", "cups", "tbsp", "tsp", "oz", "lb", "pinch"]
+AMOUNTS = ["1", "2", "3", "1/2", "1 1/2", "0.5", "250", "100", "3/4"]
+INGREDIENTS = (
+    "flour sugar eggs milk butter salt cheddar_cheese olive_oil rice "
+    "chicken_breast tomatoes onions garlic basil yogurt honey oats"
+).split()
+
+
+def make_recipe_fields(rng, i):
+    title = " ".join(rng.choice(WORDS).capitalize() for _ in range(3)) + f" {i}"
+    description = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20)))
+    tags = rng.sample(TAGS, rng.randint(0, 3))
+    ingredients = []
+    for _ in range(rng.randint(3, 12)):
+        parts = [rng.choice(AMOUNTS), rng.choice(UNITS), rng.choice(INGREDIENTS)]
+        ingredients.append(" ".join(p for p in parts if p))
+    steps = [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 15)))
+        for _ in range(rng.randint(2, 8))
+    ]
+    return title, description, ingredients, steps, tags
+
+
+def make_synthetic_corpus(recipe_folder, count, seed=1234):
+    """Write `count` random but well-formed recipes into `recipe_folder`."""
+    rng = random.Random(seed)
+    if not os.path.exists(recipe_folder):
+        os.makedirs(recipe_folder)
+    for i in range(count):
+        title, description, ingredients, steps, tags = make_recipe_fields(rng, i)
+        lines = recipe_manager.format_recipe_lines(title, description, ingredients, steps, tags)
+        file_name = title.lower().replace(" ", "_") + ".txt"
+        with open(os.path.join(recipe_folder, file_name), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+    return recipe_folder
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
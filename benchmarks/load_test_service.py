@@ -0,0 +1,146 @@
+# benchmarks/load_test_service.py
+#
+# Load-test the search service on localhost and report latency and throughput:
+#   python benchmarks/load_test_service.py [--recipes 5000] [--clients 16] [--seconds 10]
+#   python benchmarks/load_test_service.py --idle-clients 32
+#   python benchmarks/load_test_service.py --url http://127.0.0.1:8765
+#
+# Without --url an in-process server is started over a synthetic corpus.
+# --idle-clients opens keep-alive connections that make one request and then
+# sit idle for the whole run, like kiosks between searches; they must not
+# keep the active clients from being served. The per-client request counts
+# show whether any client was starved.
+
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import http.client
+from urllib.parse import quote, urlsplit
+
+from corpus import make_synthetic_corpus, percentile, WORDS, TAGS
+
+import search_service
+
+
+def request_paths(rng, ids):
+    """An endless mix of search, tag-filter, fetch and conditional requests."""
+    while True:
+        kind = rng.random()
+        if kind < 0.5:
+            yield f"/search?q={quote(rng.choice(WORDS))}&limit=20"
+        elif kind < 0.7:
+            yield f"/search?q={quote(rng.choice(WORDS) + '+' + rng.choice(WORDS))}&tag={rng.choice(TAGS)}"
+        elif kind < 0.9 and ids:
+            yield "/recipes/" + quote(rng.choice(ids), safe="")
+        else:
+            yield "/tags"
+
+
+def idle_client(host, port, ready, done):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    conn.request("GET", "/generation")
+    conn.getresponse().read()
+    ready.release()
+    done.wait()
+    conn.close()
+
+
+def client(host, port, ids, deadline, seed, latencies, statuses, counts, lock):
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    etags = {}
+    local_latencies = []
+    local_statuses = {}
+    for path in request_paths(rng, ids):
+        if time.perf_counter() >= deadline:
+            break
+        headers = {"If-None-Match": etags[path]} if path in etags else {}
+        start = time.perf_counter()
+        conn.request("GET", path, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        local_latencies.append(time.perf_counter() - start)
+        local_statuses[response.status] = local_statuses.get(response.status, 0) + 1
+        if response.getheader("ETag"):
+            etags[path] = response.getheader("ETag")
+    conn.close()
+    with lock:
+        latencies.extend(local_latencies)
+        counts.append(len(local_latencies))
+        for status, count in local_statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="existing service to test instead of starting one")
+    parser.add_argument("--recipes", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--idle-clients", type=int, default=0)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    server = None
+    tmp = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or search_service.DEFAULT_PORT
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        folder = make_synthetic_corpus(os.path.join(tmp.name, "recipes"), args.recipes)
+        server = search_service.make_server(folder, port=0, max_workers=args.workers)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+
+    conn = http.client.HTTPConnection(host, port)
+    conn.request("GET", "/search?limit=-1")
+    ids = [r["id"] for r in json.loads(conn.getresponse().read())["results"]]
+    conn.close()
+
+    ready, done = threading.Semaphore(0), threading.Event()
+    idle_threads = [
+        threading.Thread(target=idle_client, args=(host, port, ready, done))
+        for _ in range(args.idle_clients)
+    ]
+    for t in idle_threads:
+        t.start()
+    for _ in idle_threads:
+        ready.acquire()
+
+    latencies, statuses, counts, lock = [], {}, [], threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+    start = time.perf_counter()
+    threads = [
+        threading.Thread(target=client, args=(host, port, ids, deadline, i, latencies, statuses, counts, lock))
+        for i in range(args.clients)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    for t in idle_threads:
+        t.join()
+
+    print(f"{len(ids)} recipes, {args.clients} clients, {args.idle_clients} idle, {elapsed:.1f} s")
+    print(f"requests: {len(latencies)}  ({len(latencies) / elapsed:.0f} req/s)")
+    print(f"latency:  p50 {percentile(latencies, 50) * 1000:.2f} ms  "
+          f"p99 {percentile(latencies, 99) * 1000:.2f} ms  max {max(latencies, default=0) * 1000:.2f} ms")
+    print(f"per client: min {min(counts, default=0)}  max {max(counts, default=0)} requests")
+    print(f"statuses: {dict(sorted(statuses.items()))}")
+
+    if server is not None:
+        server.shutdown()
+        server.service.stop_polling()
+        server.server_close()
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# benchmarks/stress_catalog.py
+#
+# Many reader threads check catalog snapshots for consistency while a writer
+# publishes a steady stream of changes:
+#   python benchmarks/stress_catalog.py [--recipes 20000] [--readers 8] [--seconds 5]
+#
+# Exits non-zero if any reader saw an inconsistent snapshot.
+
+import sys
+import time
+import random
+import argparse
+import threading
+
+from corpus import make_recipe_fields
+
+import catalog
+import recipe_manager
+
+
+def make_recipe(rng, i):
+    title, description, ingredients, steps, tags = make_recipe_fields(rng, i)
+    return recipe_manager.Recipe(title, description, ingredients, steps, tags,
+                                 filename=f"recipes/synthetic_{i}.txt")
+
+
+def check_snapshot(snapshot, rng):
+    """Return a list of invariant violations found in a sample of the snapshot."""
+    errors = []
+    tags = snapshot.known_tags()
+    for tag in rng.sample(tags, min(3, len(tags))):
+        for rid in snapshot.tag_index[tag]:
+            recipe = snapshot.recipes.get(rid)
+            if recipe is None:
+                errors.append(f"v{snapshot.version}: tag {tag} lists missing recipe {rid}")
+            elif tag not in recipe.tags:
+                errors.append(f"v{snapshot.version}: tag {tag} lists untagged recipe {rid}")
+    count = 0
+    for rid, recipe in snapshot.recipes.items():
+        count += 1
+        for tag in recipe.tags:
+            if rid not in snapshot.tag_index.get(tag, frozenset()):
+                errors.append(f"v{snapshot.version}: {rid} missing from tag {tag}")
+    if count != len(snapshot):
+        errors.append(f"v{snapshot.version}: size {len(snapshot)} but {count} recipes")
+    return errors
+
+
+def reader(recipe_catalog, deadline, seed, stats, lock):
+    rng = random.Random(seed)
+    last_version = -1
+    reads = 0
+    errors = []
+    while time.perf_counter() < deadline:
+        snapshot = recipe_catalog.snapshot
+        if snapshot.version < last_version:
+            errors.append(f"version went backwards: {last_version} -> {snapshot.version}")
+        last_version = snapshot.version
+        errors.extend(check_snapshot(snapshot, rng))
+        reads += 1
+    with lock:
+        stats["reads"] += reads
+        stats["errors"].extend(errors)
+
+
+def writer(recipe_catalog, deadline, next_id, stats, lock):
+    rng = random.Random(99)
+    writes = 0
+    live = list(recipe_catalog.snapshot.recipes)
+    while time.perf_counter() < deadline:
+        kind = rng.random()
+        if kind < 0.4:
+            recipe = make_recipe(rng, next_id)
+            next_id += 1
+            recipe_catalog.apply(upserts=[recipe])
+            live.append(recipe_manager.recipe_id(recipe))
+        elif kind < 0.7 and live:
+            rid = rng.choice(live)
+            old = recipe_catalog.snapshot.recipes[rid]
+            retagged = recipe_manager.Recipe(old.title, old.description, old.ingredients, old.steps,
+                                             rng.sample(["vegan", "quick", "dinner", "lunch"], 2),
+                                             filename=old.filename)
+            recipe_catalog.apply(upserts=[retagged])
+        elif live:
+            rid = live.pop(rng.randrange(len(live)))
+            recipe_catalog.apply(removed_ids=[rid])
+        writes += 1
+    with lock:
+        stats["writes"] += writes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recipes", type=int, default=20000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    recipes = [make_recipe(rng, i) for i in range(args.recipes)]
+    recipe_catalog = catalog.Catalog("recipes")
+    recipe_catalog.snapshot = catalog.CatalogSnapshot.build("recipes", recipes)
+
+    start = time.perf_counter()
+    catalog.CatalogSnapshot.build("recipes", recipes)
+    rebuild_ms = (time.perf_counter() - start) * 1000
+
+    stats = {"reads": 0, "writes": 0, "errors": []}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+    threads = [threading.Thread(target=reader, args=(recipe_catalog, deadline, i, stats, lock))
+               for i in range(args.readers)]
+    threads.append(threading.Thread(target=writer,
+                                    args=(recipe_catalog, deadline, args.recipes, stats, lock)))
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    final = recipe_catalog.snapshot
+    stats["errors"].extend(check_snapshot(final, rng))
+    print(f"{args.recipes} recipes, {args.readers} readers, {elapsed:.1f} s")
+    print(f"reads:   {stats['reads']} consistency-checked snapshots ({stats['reads'] / elapsed:.0f}/s)")
+    print(f"writes:  {stats['writes']} published versions ({stats['writes'] / elapsed:.0f}/s), "
+          f"final version {final.version}, {len(final)} recipes")
+    print(f"full rebuild for comparison: {rebuild_ms:.1f} ms per write")
+    print(f"errors:  {len(stats['errors'])}")
+    for error in stats["errors"][:10]:
+        print("  " + error)
+    return 1 if stats["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
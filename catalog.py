@@ -0,0 +1,473 @@
+# catalog.py
+
+import os
+import bisect
+import threading
+
+import query
+import recipe_manager
+
+
+class PersistentMap:
+    """
+    Immutable hash map with structural sharing. Keys are spread over a fixed
+    number of bucket dicts; an update copies only the buckets it touches and
+    shares the rest with the previous version, so publishing a change costs
+    O(bucket) instead of O(catalog).
+    """
+    __slots__ = ("_buckets", "_size")
+    BUCKETS = 256
+
+    def __init__(self, items=None):
+        buckets = [{} for _ in range(self.BUCKETS)]
+        if items:
+            for key, value in items:
+                buckets[hash(key) % self.BUCKETS][key] = value
+        self._buckets = tuple(buckets)
+        self._size = sum(len(b) for b in buckets)
+
+    @classmethod
+    def _from_buckets(cls, buckets, size):
+        new = cls.__new__(cls)
+        new._buckets = buckets
+        new._size = size
+        return new
+
+    def get(self, key, default=None):
+        return self._buckets[hash(key) % self.BUCKETS].get(key, default)
+
+    def __getitem__(self, key):
+        return self._buckets[hash(key) % self.BUCKETS][key]
+
+    def __contains__(self, key):
+        return key in self._buckets[hash(key) % self.BUCKETS]
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for bucket in self._buckets:
+            yield from bucket
+
+    def items(self):
+        for bucket in self._buckets:
+            yield from bucket.items()
+
+    def values(self):
+        for bucket in self._buckets:
+            yield from bucket.values()
+
+    def evolve(self, updates=None, removes=()):
+        """Return a new map with `updates` (dict) applied and `removes` deleted."""
+        buckets = list(self._buckets)
+        copied = set()
+        size = self._size
+
+        def writable(index):
+            if index not in copied:
+                buckets[index] = dict(buckets[index])
+                copied.add(index)
+            return buckets[index]
+
+        for key in removes:
+            index = hash(key) % self.BUCKETS
+            if key in buckets[index]:
+                del writable(index)[key]
+                size -= 1
+        for key, value in (updates or {}).items():
+            index = hash(key) % self.BUCKETS
+            bucket = writable(index)
+            if key not in bucket:
+                size += 1
+            bucket[key] = value
+        return PersistentMap._from_buckets(tuple(buckets), size)
+
+
+class TermIndex:
+    """
+    Per-field token index (token -> frozenset of recipe ids) used by the query
+    planner for candidate sets and selectivity estimates. Like the snapshot
+    it belongs to it is immutable; with_changes() shares untouched postings.
+    """
+    __slots__ = ("fields", "_vocabularies")
+
+    def __init__(self, fields, vocabularies=None):
+        self.fields = fields
+        # field -> (all tokens joined by newlines, start offsets, tokens),
+        # built on first use for fast substring lookups
+        self._vocabularies = dict(vocabularies or {})
+
+    @classmethod
+    def build(cls, recipes_by_id):
+        postings = {field: {} for field in query.INDEXED_FIELDS}
+        for rid, recipe in recipes_by_id.items():
+            for field in query.INDEXED_FIELDS:
+                field_postings = postings[field]
+                for token in query.index_tokens(recipe, field):
+                    field_postings.setdefault(token, set()).add(rid)
+        return cls({
+            field: PersistentMap((token, frozenset(ids)) for token, ids in tokens.items())
+            for field, tokens in postings.items()
+        })
+
+    def _vocabulary(self, field):
+        vocabulary = self._vocabularies.get(field)
+        if vocabulary is None:
+            tokens = sorted(self.fields[field])
+            starts = []
+            offset = 0
+            for token in tokens:
+                starts.append(offset)
+                offset += len(token) + 1
+            vocabulary = self._vocabularies[field] = ("\n".join(tokens), starts, tokens)
+        return vocabulary
+
+    def vocabulary(self, field, piece):
+        """(token, ids) for every token of `field` that contains `piece`."""
+        joined, starts, tokens = self._vocabulary(field)
+        postings = self.fields[field]
+        # One str.find per hit instead of a test per token; a piece never
+        # contains the newline separator, so every hit lies inside one token
+        pos = joined.find(piece)
+        while pos != -1:
+            i = bisect.bisect_right(starts, pos) - 1
+            token = tokens[i]
+            yield token, postings[token]
+            pos = joined.find(piece, starts[i] + len(token) + 1)
+
+    def with_changes(self, old_recipes, new_recipes):
+        """`old_recipes`/`new_recipes` map changed ids to the Recipe before/after (or None)."""
+        fields = {}
+        for field, tokens in self.fields.items():
+            adds, removes = {}, {}
+            for rid in set(old_recipes) | set(new_recipes):
+                old = old_recipes.get(rid)
+                new = new_recipes.get(rid)
+                old_tokens = query.index_tokens(old, field) if old is not None else set()
+                new_tokens = query.index_tokens(new, field) if new is not None else set()
+                for token in old_tokens - new_tokens:
+                    removes.setdefault(token, set()).add(rid)
+                for token in new_tokens - old_tokens:
+                    adds.setdefault(token, set()).add(rid)
+            updates, empty = {}, []
+            for token in set(adds) | set(removes):
+                ids = (tokens.get(token, frozenset()) - removes.get(token, set())) | adds.get(token, set())
+                if ids:
+                    updates[token] = frozenset(ids)
+                else:
+                    empty.append(token)
+            fields[field] = tokens.evolve(updates, empty) if updates or empty else tokens
+        unchanged = {f: v for f, v in self._vocabularies.items() if fields[f] is self.fields[f]}
+        return TermIndex(fields, unchanged)
+
+
+class CatalogSnapshot:
+    """
+    One immutable version of the catalog: recipes by id, the tag index
+    (tag -> frozenset of ids) and, for folder libraries, the file stats the
+    generation fingerprint is computed from. Never modified after publishing,
+    so any number of threads can read it without locking.
+    """
+    __slots__ = ("version", "recipe_folder", "recipes", "tag_index", "file_stats",
+                 "_recipe_list", "_generation", "_term_index")
+
+    def __init__(self, version, recipe_folder, recipes, tag_index, file_stats, term_index=None):
+        self.version = version
+        self.recipe_folder = recipe_folder
+        self.recipes = recipes
+        self.tag_index = tag_index
+        self.file_stats = file_stats
+        self._recipe_list = None
+        self._generation = None
+        self._term_index = term_index
+
+    @classmethod
+    def build(cls, recipe_folder, recipes, file_stats=None, version=1):
+        by_id = {}
+        tags = {}
+        for r in recipes:
+            rid = recipe_manager.recipe_id(r)
+            by_id[rid] = r
+            for t in r.tags:
+                tags.setdefault(t, set()).add(rid)
+        return cls(
+            version,
+            recipe_folder,
+            PersistentMap(by_id.items()),
+            PersistentMap((t, frozenset(ids)) for t, ids in tags.items()),
+            PersistentMap(file_stats.items()) if file_stats is not None else None,
+        )
+
+    def __len__(self):
+        return len(self.recipes)
+
+    def recipe_list(self):
+        """All recipes sorted by title; computed once per snapshot."""
+        if self._recipe_list is None:
+            self._recipe_list = sorted(
+                self.recipes.values(),
+                key=lambda r: (r.title.lower(), recipe_manager.recipe_id(r))
+            )
+        return self._recipe_list
+
+    @property
+    def generation(self):
+        """On-disk fingerprint, matching recipe_manager.catalog_generation."""
+        if self._generation is None:
+            stats = dict(self.file_stats.items()) if self.file_stats is not None else None
+            self._generation = recipe_manager.catalog_generation(self.recipe_folder, stats)
+        return self._generation
+
+    def known_tags(self):
+        return sorted(self.tag_index)
+
+    def term_index(self):
+        """
+        The token index, built on first use. Once built it is carried into
+        later versions incrementally by with_changes().
+        """
+        if self._term_index is None:
+            self._term_index = TermIndex.build(self.recipes)
+        return self._term_index
+
+    def with_changes(self, upserts=(), removed_ids=(), stats_updates=None, stats_removes=()):
+        """
+        Next version with `upserts` (Recipe objects) added or replaced and
+        `removed_ids` dropped. Only the touched buckets and tag postings are
+        copied.
+        """
+        recipe_updates = {}
+        tag_adds = {}
+        tag_removes = {}
+
+        def untag(rid):
+            old = recipe_updates.get(rid) or self.recipes.get(rid)
+            if old is not None:
+                for t in old.tags:
+                    tag_removes.setdefault(t, set()).add(rid)
+                    tag_adds.get(t, set()).discard(rid)
+
+        for rid in removed_ids:
+            untag(rid)
+        for r in upserts:
+            rid = recipe_manager.recipe_id(r)
+            untag(rid)
+            recipe_updates[rid] = r
+            for t in r.tags:
+                tag_adds.setdefault(t, set()).add(rid)
+                tag_removes.get(t, set()).discard(rid)
+
+        removed = [rid for rid in removed_ids if rid not in recipe_updates]
+        recipes = self.recipes.evolve(recipe_updates, removed)
+
+        posting_updates = {}
+        empty_tags = []
+        for t in set(tag_adds) | set(tag_removes):
+            ids = (self.tag_index.get(t, frozenset()) - tag_removes.get(t, set())) | tag_adds.get(t, set())
+            if ids:
+                posting_updates[t] = frozenset(ids)
+            else:
+                empty_tags.append(t)
+        tag_index = self.tag_index.evolve(posting_updates, empty_tags)
+
+        file_stats = self.file_stats
+        if file_stats is not None and (stats_updates or stats_removes):
+            file_stats = file_stats.evolve(stats_updates, stats_removes)
+
+        term_index = None
+        if self._term_index is not None:
+            changed = set(recipe_updates) | set(removed)
+            term_index = self._term_index.with_changes(
+                {rid: self.recipes.get(rid) for rid in changed if rid in self.recipes},
+                {rid: recipe_updates[rid] for rid in changed if rid in recipe_updates},
+            )
+
+        return CatalogSnapshot(self.version + 1, self.recipe_folder, recipes, tag_index,
+                               file_stats, term_index)
+
+    def _iter_matches(self, search_query, selected_tags):
+        # Parses eagerly so syntax errors surface before any iteration
+        tree = query.parse_query(search_query)
+        tags = [t.strip().lower() for t in (selected_tags or []) if t.strip()]
+        if tags:
+            tree = query.And([query.Term("tag", t) for t in tags] + [tree])
+        if isinstance(tree, query.MatchAll):
+            return iter(self.recipe_list())
+        # The index is built in the background after Catalog.load; until then,
+        # and for broad queries, one ordered pass over the recipes is cheapest
+        if self._term_index is not None:
+            ctx = query.QueryContext(self)
+            if query.is_selective(tree, ctx):
+                ids = tree.evaluate(ctx)
+                return iter(sorted(
+                    (self.recipes[rid] for rid in ids),
+                    key=lambda r: (r.title.lower(), recipe_manager.recipe_id(r))
+                ))
+        return (r for r in self.recipe_list() if tree.matches(r))
+
+    def search(self, search_query, selected_tags=None):
+        """
+        Recipes matching a query (see query.py) and carrying all
+        `selected_tags`, sorted by title. Raises query.QuerySyntaxError.
+        """
+        return list(self._iter_matches(search_query, selected_tags))
+
+    def iter_search(self, search_query, selected_tags=None,
+                    batch_size=recipe_manager.SEARCH_BATCH_SIZE, offset=0, limit=None):
+        """
+        search() delivered incrementally, in lists of up to `batch_size`.
+        Broad queries are matched as the batches are consumed, so the first
+        page costs only as much scanning as it takes to fill it.
+        """
+        return recipe_manager.batched(self._iter_matches(search_query, selected_tags),
+                                      batch_size, offset, limit)
+
+
+class Catalog:
+    """
+    The current CatalogSnapshot of one library. Readers just take
+    `catalog.snapshot` (a single attribute read) and keep using that version.
+    Writers serialize on a lock, do their file I/O, and publish the next
+    version by swapping the attribute.
+    """
+    def __init__(self, recipe_folder="recipes"):
+        self.recipe_folder = recipe_folder
+        self._write_lock = threading.Lock()
+        self.snapshot = CatalogSnapshot.build(
+            recipe_folder, [], None if recipe_manager.is_archive(recipe_folder) else {}, version=0
+        )
+
+    def _publish(self, snapshot, generation=None):
+        if generation is None and recipe_manager.is_archive(self.recipe_folder):
+            # The archive fingerprint is a stat, so pin it at publish time
+            generation = recipe_manager.catalog_generation(self.recipe_folder)
+        if generation is not None:
+            snapshot._generation = generation
+        self.snapshot = snapshot
+        return snapshot
+
+    def _stat(self, path):
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def load(self):
+        """Full (re)load from disk."""
+        with self._write_lock:
+            # Fingerprint first: a file changed during the load then looks stale, not current
+            stats = None
+            generation = None
+            if recipe_manager.is_archive(self.recipe_folder):
+                generation = recipe_manager.catalog_generation(self.recipe_folder)
+            else:
+                stats = recipe_manager.scan_recipe_files(self.recipe_folder)
+            recipes = recipe_manager.load_recipes(self.recipe_folder)
+            snapshot = CatalogSnapshot.build(
+                self.recipe_folder, recipes, stats, version=self.snapshot.version + 1
+            )
+            self._publish(snapshot, generation)
+            if generation is not None:
+                import recipe_archive
+                # Reclaims the space of edits and deletes while the app runs
+                recipe_archive.open_archive(self.recipe_folder).start_background_compaction()
+        threading.Thread(target=self._build_term_index, name="term-index", daemon=True).start()
+        return snapshot
+
+    def _build_term_index(self):
+        # Build on the current version; if a write published a newer one in
+        # the meantime (without the index), build again on that one. Writers
+        # hold the write lock from reading the old version to publishing the
+        # new one, so checking under it cannot miss a version still in flight
+        while True:
+            snapshot = self.snapshot
+            snapshot.term_index()
+            with self._write_lock:
+                if self.snapshot is snapshot or self.snapshot._term_index is not None:
+                    return
+
+    def refresh(self):
+        """Apply on-disk changes as a delta (the watcher path). Returns the snapshot."""
+        if recipe_manager.is_archive(self.recipe_folder):
+            current = self.snapshot
+            if recipe_manager.catalog_generation(self.recipe_folder) != current.generation:
+                return self.load()
+            return current
+
+        with self._write_lock:
+            current = self.snapshot
+            old_stats = dict(current.file_stats.items())
+            by_path = {r.filename: r for r in current.recipes.values()}
+            new_by_path, new_stats, changed, removed = recipe_manager.refresh_recipes(
+                by_path, old_stats, self.recipe_folder
+            )
+            if not changed and not removed:
+                return current
+            upserts = [new_by_path[p] for p in changed if p in new_by_path]
+            removed_ids = [recipe_manager.recipe_id(by_path[p]) for p in removed if p in by_path]
+            return self._publish(current.with_changes(
+                upserts, removed_ids,
+                stats_updates={p: new_stats[p] for p in changed},
+                stats_removes=removed,
+            ))
+
+    def _read_back(self, rid):
+        if recipe_manager.is_archive(self.recipe_folder):
+            import recipe_archive
+            key = rid.split("::", 1)[1]
+            return recipe_archive.open_archive(self.recipe_folder).get_recipe(key), None
+        return recipe_manager.parse_recipe_file(rid), {rid: self._stat(rid)}
+
+    def add_recipe(self, title, description, ingredients, steps, tags=None):
+        """recipe_manager.add_recipe, then publish a version containing the new recipe."""
+        with self._write_lock:
+            rid = recipe_manager.add_recipe(
+                title, description, ingredients, steps, tags, recipe_folder=self.recipe_folder
+            )
+            if rid:
+                recipe, stats = self._read_back(rid)
+                self._publish(self.snapshot.with_changes([recipe], stats_updates=stats))
+            return rid
+
+    def update_recipe(self, recipe_obj, new_title, new_description, new_ingredients, new_steps, new_tags):
+        with self._write_lock:
+            success = recipe_manager.update_recipe(
+                recipe_obj, new_title, new_description, new_ingredients, new_steps, new_tags
+            )
+            if success:
+                recipe, stats = self._read_back(recipe_manager.recipe_id(recipe_obj))
+                self._publish(self.snapshot.with_changes([recipe], stats_updates=stats))
+            return success
+
+    def delete_recipe(self, recipe_obj):
+        with self._write_lock:
+            success = recipe_manager.delete_recipe(recipe_obj)
+            if success:
+                rid = recipe_manager.recipe_id(recipe_obj)
+                stats_removes = [] if recipe_obj.archive else [rid]
+                self._publish(self.snapshot.with_changes(removed_ids=[rid], stats_removes=stats_removes))
+            return success
+
+    def _publish_batch(self, journal):
+        if journal.upserts or journal.removed_ids:
+            self._publish(self.snapshot.with_changes(
+                journal.upserts, journal.removed_ids,
+                stats_updates=journal.file_stats, stats_removes=journal.removed_ids,
+            ))
+        return journal
+
+    def bulk_delete(self, recipes):
+        """recipe_manager.bulk_delete_recipes, then one catalog update. Returns the BatchJournal."""
+        with self._write_lock:
+            return self._publish_batch(recipe_manager.bulk_delete_recipes(recipes))
+
+    def bulk_retag(self, recipes, add_tags=(), remove_tags=()):
+        with self._write_lock:
+            return self._publish_batch(recipe_manager.bulk_retag_recipes(recipes, add_tags, remove_tags))
+
+    def undo_batch(self, journal):
+        with self._write_lock:
+            return self._publish_batch(recipe_manager.undo_batch(journal))
+
+    def apply(self, upserts=(), removed_ids=()):
+        """Publish in-memory changes directly (no file I/O); used by batch writers and tests."""
+        with self._write_lock:
+            return self._publish(self.snapshot.with_changes(upserts, removed_ids))
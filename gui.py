@@ -1,27 +1,98 @@
 import os
 import sys
+import html
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-from PySide6.QtCore import Qt, Slot, QPoint
+from PySide6.QtCore import Qt, Slot, QPoint, QObject, Signal, QTimer
 from PySide6.QtGui import QAction, QKeySequence, QFont
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, 
     QListWidget, QListWidgetItem, QMessageBox, QApplication,
     QMenuBar, QMenu, QPushButton, QDialog, QFormLayout,
     QLineEdit, QTextEdit, QCheckBox, QLabel, QDialogButtonBox,
-    QSpacerItem, QSizePolicy, QGroupBox
+    QSpacerItem, QSizePolicy, QGroupBox, QDockWidget, QTextBrowser,
+    QInputDialog, QAbstractItemView, QFileDialog
 )
 
+import libraries
+import recipe_archive
 import recipe_manager
 import settings_manager
 
+# Search results are listed in pages: the first synchronously, the rest from
+# an idle timer (at most SEARCH_PUMP_BUDGET seconds per event-loop turn) or
+# as soon as the user scrolls to the end of what is listed.
+SEARCH_PAGE_SIZE = 100
+SEARCH_PUMP_BUDGET = 0.008
+
+
+def render_recipe_html(recipe):
+    """Build the preview HTML for a recipe."""
+    parts = [
+        f"<b>{html.escape(recipe.title)}</b><br>",
+        f"<i>Description:</i> {html.escape(recipe.description)}<br><br>",
+        f"<i>Tags:</i> {html.escape(', '.join(recipe.tags))}<br><br>",
+        "<i>Ingredients:</i><br>",
+    ]
+    parts.extend(f" - {html.escape(ing)}<br>" for ing in recipe.ingredients)
+    parts.append("<br><i>Steps:</i><br>")
+    parts.extend(f"{html.escape(step)}<br>" for step in recipe.steps)
+    return "".join(parts)
+
+
+class RecipeHtmlCache:
+    """
+    Bounded LRU cache of rendered recipe HTML, keyed by recipe id and the
+    file stat captured when the recipe was loaded, so an edited file is
+    re-rendered without touching the disk here. Safe to fill from a
+    prefetch worker thread.
+    """
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, recipe, file_stat=None):
+        # Archive recipes have no file stat; an edit there yields a new Recipe
+        return (recipe_manager.recipe_id(recipe), file_stat if file_stat is not None else recipe)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, recipe, file_stat=None):
+        key = self.key(recipe, file_stat)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                return cached
+
+        rendered = render_recipe_html(recipe)
+        with self._lock:
+            self._entries[key] = rendered
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return rendered
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
 
 class AddRecipeDialog(QDialog):
     """
     Dialog for adding a new recipe, with checkboxes for known tags plus a field to add custom tags.
     """
-    def __init__(self, known_tags, parent=None):
+    def __init__(self, known_tags, parent=None, catalog=None):
         super().__init__(parent)
         self.setWindowTitle("Add New Recipe")
+        # Writes go through the catalog when there is one, so it publishes the change
+        self.writer = catalog if catalog is not None else recipe_manager
         self.resize(500, 450)
 
         self.title_edit = QLineEdit()
@@ -109,7 +180,7 @@ class AddRecipeDialog(QDialog):
                 return
 
         try:
-            recipe_path = recipe_manager.add_recipe(
+            recipe_path = self.writer.add_recipe(
                 title=title,
                 description=description,
                 ingredients=ingredients,
@@ -132,9 +203,10 @@ class EditRecipeDialog(QDialog):
     Dialog for editing an existing recipe. 
     Also shows checkboxes for known tags, plus a field to add new tags.
     """
-    def __init__(self, recipe_obj, known_tags, parent=None):
+    def __init__(self, recipe_obj, known_tags, parent=None, catalog=None):
         super().__init__(parent)
         self.setWindowTitle("Edit Recipe")
+        self.writer = catalog if catalog is not None else recipe_manager
         self.resize(500, 450)
         self.recipe_obj = recipe_obj
 
@@ -212,7 +284,7 @@ class EditRecipeDialog(QDialog):
             return
 
         try:
-            success = recipe_manager.update_recipe(
+            success = self.writer.update_recipe(
                 recipe_obj=self.recipe_obj,
                 new_title=new_title,
                 new_description=new_description,
@@ -231,6 +303,22 @@ class EditRecipeDialog(QDialog):
             QMessageBox.critical(self, "Error", f"Unexpected error:\n{e}")
 
 
+class CatalogLoader(QObject):
+    """
+    Loads a catalog.Catalog, libraries.Library or libraries.LibrarySet on a
+    background thread and hands the published snapshot back to the GUI
+    thread through the `loaded` signal.
+    """
+    loaded = Signal(object)
+
+    def start(self, recipe_catalog):
+        thread = threading.Thread(target=self._run, args=(recipe_catalog,), daemon=True)
+        thread.start()
+
+    def _run(self, recipe_catalog):
+        self.loaded.emit(recipe_catalog.load())
+
+
 class AMBROSIA(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -240,14 +328,31 @@ class AMBROSIA(QMainWindow):
         # Load settings
         self.settings = settings_manager.load_settings()
 
-        # Load recipes
-        self.recipes = recipe_manager.load_recipes()
+        # Restore the previous session. The catalog loads in the background;
+        # until it arrives the last results are shown from the session snapshot.
+        # Session changes are written once they have settled for a second
+        self.session_timer = QTimer(self)
+        self.session_timer.setSingleShot(True)
+        self.session_timer.setInterval(1000)
+        self.session = settings_manager.SessionStore(on_change=self.session_timer.start)
+        self.session_timer.timeout.connect(self.session.flush)
+        self.libraries = libraries.LibrarySet.from_settings(self.settings)
+        self.catalog_loaded = False
+        # BatchJournal of the last bulk operation, for Edit > Undo
+        self.last_batch = None
+        # Search results still being listed (see pump_search_stream)
+        self.search_stream = None
+        self.stream_results = []
+        self.restore_position_pending = False
+        self.stream_timer = QTimer(self)
+        self.stream_timer.setInterval(0)
+        self.stream_timer.timeout.connect(self.pump_search_stream)
+        snapshot = self.session.state.get("snapshot") or {}
 
         # The user can define default tags in settings. We'll also gather all tags from existing recipes.
         all_tags = set(self.settings.get("default_tags", []))
-        for r in self.recipes:
-            for t in r.tags:
-                all_tags.add(t.lower())
+        all_tags.update(snapshot.get("known_tags", []))
+        all_tags.update(self.session.state.get("selected_tags", []))
         self.all_known_tags = sorted(all_tags)
 
         # Central widget
@@ -257,30 +362,41 @@ class AMBROSIA(QMainWindow):
         central_widget.setLayout(main_layout)
 
         # Tag filter row
-        tag_layout = QHBoxLayout()
-        tag_layout.addWidget(QLabel("Filter by tags:"))
+        self.tag_layout = QHBoxLayout()
+        self.tag_layout.addWidget(QLabel("Filter by tags:"))
         self.tag_checkboxes = []
-        for t in self.all_known_tags:
-            cb = QCheckBox(t.capitalize())
-            cb.stateChanged.connect(self.on_tag_filter_changed)
-            self.tag_checkboxes.append(cb)
-            tag_layout.addWidget(cb)
-        main_layout.addLayout(tag_layout)
+        self.build_tag_checkboxes(self.session.state.get("selected_tags", []))
+        main_layout.addLayout(self.tag_layout)
 
         # Search bar
         self.search_bar = QLineEdit()
-        self.search_bar.setPlaceholderText("Search recipes... (space=phrase, + AND, , OR)")
+        self.search_bar.setPlaceholderText("Search recipes... (space=phrase, + AND, , OR, title:/tag:/ingredient:/step:, AND/OR/NOT, ( ))")
+        self.search_bar.setText(self.session.state.get("last_query", ""))
         self.search_bar.returnPressed.connect(self.perform_search)
         main_layout.addWidget(self.search_bar)
 
         # Recipe list
         self.recipe_list = QListWidget()
+        self.recipe_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.recipe_list.itemDoubleClicked.connect(self.show_recipe_detail)
+        self.recipe_list.currentItemChanged.connect(self.on_current_recipe_changed)
         self.recipe_list.setContextMenuPolicy(Qt.CustomContextMenu)
         self.recipe_list.customContextMenuRequested.connect(self.show_context_menu)
+        self.recipe_list.verticalScrollBar().valueChanged.connect(self.on_scroll_changed)
         main_layout.addWidget(self.recipe_list)
 
-        self.display_recipes(self.recipes)
+        # Docked, non-modal preview pane that follows the selection.
+        # Neighbouring rows are rendered ahead of time on a worker thread.
+        self.html_cache = RecipeHtmlCache()
+        self.prefetch_pool = ThreadPoolExecutor(max_workers=1)
+        self.prefetch_futures = []
+        self.preview = QTextBrowser()
+        self.preview_dock = QDockWidget("Preview", self)
+        self.preview_dock.setObjectName("preview_dock")
+        self.preview_dock.setWidget(self.preview)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.preview_dock)
+
+        self.show_session_snapshot(snapshot)
 
         # Menu Bar
         self.create_menu_bar()
@@ -291,12 +407,32 @@ class AMBROSIA(QMainWindow):
         # Shortcuts
         self.register_shortcuts()
 
+        self.catalog_loader = CatalogLoader()
+        self.catalog_loader.loaded.connect(self.on_catalog_loaded)
+        self.catalog_loader.start(self.libraries)
+        # Add Recipe before the target library has loaded: load it in the
+        # background and open the dialog once it is in
+        self.add_dialog_loader = CatalogLoader()
+        self.add_dialog_loader.loaded.connect(self.on_add_library_loaded)
+        self.add_dialog_pending = False
+
+        # Disabled libraries stay loaded for quick re-enabling until memory runs short
+        self.memory_timer = QTimer(self)
+        self.memory_timer.setInterval(60000)
+        self.memory_timer.timeout.connect(self.libraries.trim_memory)
+        self.memory_timer.start()
+
     def closeEvent(self, event):
         """
         Called when the window closes.
         We save the settings to disk here.
         """
         settings_manager.save_settings(self.settings)
+        self.session_timer.stop()
+        self.session.flush()
+        self.prefetch_pool.shutdown(wait=False, cancel_futures=True)
+        # Saves the archive indexes and releases their locks
+        recipe_archive.close_all()
         super().closeEvent(event)
 
     def create_menu_bar(self):
@@ -309,6 +445,15 @@ class AMBROSIA(QMainWindow):
         add_recipe_action.triggered.connect(self.open_add_dialog)
         file_menu.addAction(add_recipe_action)
 
+        reload_action = QAction("Reload Recipes", self)
+        reload_action.setShortcut(QKeySequence("F5"))
+        reload_action.triggered.connect(self.reload_recipes)
+        file_menu.addAction(reload_action)
+
+        shopping_list_action = QAction("Shopping List...", self)
+        shopping_list_action.triggered.connect(self.show_shopping_list)
+        file_menu.addAction(shopping_list_action)
+
         check_recipes_action = QAction("Check Recipes", self)
         check_recipes_action.triggered.connect(self.check_recipes)
         file_menu.addAction(check_recipes_action)
@@ -320,6 +465,15 @@ class AMBROSIA(QMainWindow):
 
         menu_bar.addMenu(file_menu)
 
+        # Edit Menu
+        edit_menu = QMenu("Edit", self)
+        self.undo_action = QAction("Undo", self)
+        self.undo_action.setShortcut(QKeySequence("Ctrl+Z"))
+        self.undo_action.setEnabled(False)
+        self.undo_action.triggered.connect(self.undo_last_batch)
+        edit_menu.addAction(self.undo_action)
+        menu_bar.addMenu(edit_menu)
+
         # Appearance Menu
         appearance_menu = QMenu("Appearance", self)
 
@@ -365,6 +519,22 @@ class AMBROSIA(QMainWindow):
         appearance_menu.addAction(self.dark_mode_action)
 
         menu_bar.addMenu(appearance_menu)
+
+        # View Menu
+        view_menu = QMenu("View", self)
+        view_menu.addAction(self.preview_dock.toggleViewAction())
+        menu_bar.addMenu(view_menu)
+
+        # Libraries Menu: which configured libraries are searched
+        libraries_menu = QMenu("Libraries", self)
+        for library in self.libraries.libraries:
+            action = QAction(library.name, self, checkable=True)
+            action.setChecked(library.enabled)
+            action.setToolTip(library.path)
+            action.toggled.connect(lambda checked, name=library.name: self.set_library_enabled(name, checked))
+            libraries_menu.addAction(action)
+        menu_bar.addMenu(libraries_menu)
+
         self.setMenuBar(menu_bar)
 
         # Sync the check states with current settings
@@ -521,11 +691,139 @@ class AMBROSIA(QMainWindow):
         # Dark mode
         self.dark_mode_action.setChecked(self.settings["is_dark_mode"])
 
+    @property
+    def recipes(self):
+        """All recipes of the enabled libraries."""
+        return self.libraries.snapshot.recipe_list()
+
+    def build_tag_checkboxes(self, checked_tags):
+        for cb in self.tag_checkboxes:
+            self.tag_layout.removeWidget(cb)
+            cb.deleteLater()
+        self.tag_checkboxes = []
+        checked = {t.lower() for t in checked_tags}
+        for t in self.all_known_tags:
+            cb = QCheckBox(t.capitalize())
+            cb.setFont(self.font())
+            cb.setChecked(t in checked)
+            cb.stateChanged.connect(self.on_tag_filter_changed)
+            self.tag_checkboxes.append(cb)
+            self.tag_layout.addWidget(cb)
+
+    def refresh_known_tags(self):
+        """Re-gather tags from settings and recipes, rebuilding the filter row if they changed."""
+        new_tags = set(self.settings["default_tags"])
+        new_tags.update(self.libraries.snapshot.known_tags())
+        if sorted(new_tags) != self.all_known_tags:
+            checked = self.get_selected_tags()
+            self.all_known_tags = sorted(new_tags)
+            self.build_tag_checkboxes(checked)
+
+    def set_library_enabled(self, name, enabled):
+        self.libraries.set_enabled(name, enabled)
+        self.settings["libraries"] = self.libraries.to_settings()
+        if enabled:
+            # Load it in the background; on_catalog_loaded searches again
+            self.statusBar().showMessage(f"Loading {name}...")
+            self.catalog_loader.start(self.libraries)
+            return
+        self.libraries.trim_memory()
+        self.refresh_known_tags()
+        self.perform_search()
+
+    def reload_recipes(self):
+        """Pick up recipe files changed outside the app."""
+        if not self.catalog_loaded:
+            return
+        self.libraries.refresh()
+        self.refresh_known_tags()
+        self.perform_search()
+
+    def show_session_snapshot(self, snapshot):
+        """Show the previous session's results before the catalog has loaded."""
+        self.restored_view = (self.search_bar.text(), self.get_selected_tags())
+        self.recipe_list.clear()
+        ids = snapshot.get("result_ids", [])
+        titles = snapshot.get("result_titles", [])
+        for rid, title in zip(ids, titles):
+            item = QListWidgetItem(title)
+            item.setData(Qt.UserRole, None)
+            item.setData(Qt.UserRole + 1, rid)
+            self.recipe_list.addItem(item)
+        self.restore_list_position()
+
+    def restore_list_position(self):
+        current_id = self.session.state.get("current_id")
+        scroll = self.session.state.get("scroll_position", 0)
+        for row in range(self.recipe_list.count()):
+            if self.recipe_list.item(row).data(Qt.UserRole + 1) == current_id:
+                self.recipe_list.setCurrentRow(row)
+                break
+        # The scroll range is only known once the list has been laid out
+        QTimer.singleShot(0, lambda: self.recipe_list.verticalScrollBar().setValue(scroll))
+
+    @Slot(object)
+    def on_catalog_loaded(self, catalog_snapshot):
+        self.catalog_loaded = True
+        self.refresh_known_tags()
+
+        session_snapshot = self.session.state.get("snapshot") or {}
+        unchanged_view = self.restored_view == (self.search_bar.text(), self.get_selected_tags())
+        if (
+            unchanged_view
+            and session_snapshot.get("generation") == catalog_snapshot.generation
+            and not session_snapshot.get("truncated")
+        ):
+            # Catalog is the one the snapshot was taken from: reuse its results
+            by_id = catalog_snapshot.recipes
+            results = [by_id[rid] for rid in session_snapshot.get("result_ids", []) if rid in by_id]
+            self.display_recipes(results)
+        else:
+            self.perform_search()
+        if self.search_stream is not None:
+            # Rows are still streaming in; restore once they are all listed
+            self.restore_position_pending = True
+        else:
+            self.restore_list_position()
+
+    def save_session_view(self, results):
+        ids = [recipe_manager.recipe_id(r) for r in results]
+        limit = settings_manager.SESSION_SNAPSHOT_LIMIT
+        self.session.update(
+            last_query=self.search_bar.text(),
+            selected_tags=self.get_selected_tags(),
+            snapshot={
+                "generation": self.libraries.snapshot.generation,
+                "result_ids": ids[:limit],
+                "result_titles": [r.title for r in results[:limit]],
+                "truncated": len(ids) > limit,
+                "known_tags": self.all_known_tags,
+            },
+        )
+
+    def on_scroll_changed(self, value):
+        self.session.update(scroll_position=value)
+        scroll_bar = self.recipe_list.verticalScrollBar()
+        if self.search_stream is not None and value >= scroll_bar.maximum() - scroll_bar.pageStep():
+            self.pump_search_stream(pages=1)
+
     def display_recipes(self, recipes):
+        self.cancel_search_stream()
         self.recipe_list.clear()
+        self.append_recipes(recipes)
+
+    def append_recipes(self, recipes):
+        snapshot = self.libraries.snapshot
+        # Label rows with their library once more than one is searched
+        show_library = len(snapshot.parts) > 1
         for recipe in recipes:
             item = QListWidgetItem(recipe.title)
+            if show_library:
+                library = snapshot.library_of(recipe)
+                item.setText(f"{recipe.title}  [{library}]")
+                item.setToolTip(f"Library: {library}")
             item.setData(Qt.UserRole, recipe)
+            item.setData(Qt.UserRole + 1, recipe_manager.recipe_id(recipe))
             if not recipe.is_valid:
                 item.setForeground(Qt.red)
             self.recipe_list.addItem(item)
@@ -533,8 +831,56 @@ class AMBROSIA(QMainWindow):
     def perform_search(self):
         query = self.search_bar.text()
         selected_tags = self.get_selected_tags()
-        results = recipe_manager.search_recipes(self.recipes, query, selected_tags)
-        self.display_recipes(results)
+        if not self.catalog_loaded:
+            # on_catalog_loaded runs the search once the recipes are in
+            self.session.update(last_query=query, selected_tags=selected_tags)
+            return
+        try:
+            stream = self.libraries.snapshot.iter_search(query, selected_tags, batch_size=SEARCH_PAGE_SIZE)
+        except ValueError as e:
+            # Half-typed queries such as "(tag:dinner OR" are normal; keep the old results
+            self.statusBar().showMessage(f"Search: {e}", 3000)
+            return
+        self.display_recipes([])
+        self.search_stream = stream
+        self.stream_results = []
+        # First page now, so the list is never blank; the rest from the timer
+        self.pump_search_stream(pages=1)
+        if self.search_stream is not None:
+            self.stream_timer.start()
+
+    def pump_search_stream(self, pages=None):
+        """List the next result pages: `pages` of them, or as many as fit in the time budget."""
+        if self.search_stream is None:
+            return
+        deadline = time.perf_counter() + SEARCH_PUMP_BUDGET
+        pulled = 0
+        while pages is None or pulled < pages:
+            batch = next(self.search_stream, None)
+            if batch is None:
+                self.finish_search_stream()
+                return
+            self.stream_results.extend(batch)
+            self.append_recipes(batch)
+            pulled += 1
+            if pages is None and time.perf_counter() >= deadline:
+                break
+        self.statusBar().showMessage(f"{len(self.stream_results)} recipes so far...")
+
+    def finish_search_stream(self):
+        self.stream_timer.stop()
+        self.search_stream = None
+        results = self.stream_results
+        self.statusBar().showMessage(f"{len(results)} recipe(s)")
+        self.save_session_view(results)
+        if self.restore_position_pending:
+            self.restore_position_pending = False
+            self.restore_list_position()
+
+    def cancel_search_stream(self):
+        self.stream_timer.stop()
+        self.search_stream = None
+        self.restore_position_pending = False
 
     def get_selected_tags(self):
         chosen = []
@@ -548,49 +894,187 @@ class AMBROSIA(QMainWindow):
         self.perform_search()
 
     def show_recipe_detail(self, item):
-        recipe = item.data(Qt.UserRole)
-        detail_msg = (
-            f"<b>{recipe.title}</b><br>"
-            f"<i>Description:</i> {recipe.description}<br><br>"
-            f"<i>Tags:</i> {', '.join(recipe.tags)}<br><br>"
-            f"<i>Ingredients:</i><br>"
-        )
-        for ing in recipe.ingredients:
-            detail_msg += f" - {ing}<br>"
-        detail_msg += "<br><i>Steps:</i><br>"
-        for step in recipe.steps:
-            detail_msg += f"{step}<br>"
+        self.preview_dock.show()
+        self.preview_dock.raise_()
+        self.on_current_recipe_changed(item, None)
 
-        QMessageBox.information(self, recipe.title, detail_msg)
+    def on_current_recipe_changed(self, current, previous):
+        if current is None:
+            self.preview.clear()
+            return
+        self.session.update(current_id=current.data(Qt.UserRole + 1))
+        recipe = current.data(Qt.UserRole)
+        if recipe is None:
+            # Snapshot row from the last session; the catalog is still loading
+            self.preview.setHtml(f"<b>{html.escape(current.text())}</b><br><i>Loading...</i>")
+            return
+        snapshot = self.libraries.snapshot
+        self.preview.setHtml(self.html_cache.get(recipe, snapshot.file_stat(recipe)))
+        self.prefetch_neighbours(self.recipe_list.row(current), snapshot)
+
+    def prefetch_neighbours(self, row, snapshot, radius=2):
+        """Render the rows around `row` in the background so arrowing never stalls."""
+        # Renders still queued for an earlier selection are no longer wanted
+        for future in self.prefetch_futures:
+            future.cancel()
+        self.prefetch_futures = []
+        for r in range(row - radius, row + radius + 1):
+            if r == row or not 0 <= r < self.recipe_list.count():
+                continue
+            recipe = self.recipe_list.item(r).data(Qt.UserRole)
+            if recipe is None:
+                continue
+            file_stat = snapshot.file_stat(recipe)
+            if self.html_cache.key(recipe, file_stat) in self.html_cache:
+                continue
+            self.prefetch_futures.append(
+                self.prefetch_pool.submit(self.html_cache.get, recipe, file_stat)
+            )
 
     def show_context_menu(self, position: QPoint):
         item = self.recipe_list.itemAt(position)
         if not item:
             return
         recipe = item.data(Qt.UserRole)
+        if recipe is None:
+            return
+        selected = self.selected_recipes()
+        if recipe not in selected:
+            selected = [recipe]
 
         menu = QMenu(self)
-        edit_action = QAction("Edit", self)
-        delete_action = QAction("Delete", self)
+        if len(selected) == 1:
+            edit_action = QAction("Edit", self)
+            delete_action = QAction("Delete", self)
+            edit_action.triggered.connect(lambda: self.edit_recipe(recipe))
+            delete_action.triggered.connect(lambda: self.delete_recipe(recipe))
+            menu.addAction(edit_action)
+            menu.addAction(delete_action)
+        else:
+            delete_action = QAction(f"Delete {len(selected)} Recipes", self)
+            delete_action.triggered.connect(lambda: self.bulk_delete(selected))
+            menu.addAction(delete_action)
+
+        add_tags_action = QAction("Add Tags...", self)
+        remove_tags_action = QAction("Remove Tags...", self)
+        export_action = QAction("Export...", self)
+        add_tags_action.triggered.connect(lambda: self.bulk_add_tags(selected))
+        remove_tags_action.triggered.connect(lambda: self.bulk_remove_tags(selected))
+        export_action.triggered.connect(lambda: self.bulk_export(selected))
+        menu.addSeparator()
+        menu.addAction(add_tags_action)
+        menu.addAction(remove_tags_action)
+        menu.addAction(export_action)
+        menu.exec(self.recipe_list.mapToGlobal(position))
 
-        edit_action.triggered.connect(lambda: self.edit_recipe(recipe))
-        delete_action.triggered.connect(lambda: self.delete_recipe(recipe))
+    def selected_recipes(self):
+        recipes = []
+        for item in self.recipe_list.selectedItems():
+            recipe = item.data(Qt.UserRole)
+            if recipe is not None:
+                recipes.append(recipe)
+        return recipes
+
+    def finish_batch(self, journal):
+        """Report a bulk operation and, if it changed anything, offer it for undo."""
+        if journal.failed:
+            msg = "Nothing was changed; these recipes could not be processed:\n"
+            for rid, error in journal.failed[:20]:
+                msg += f" - {os.path.basename(rid)}: {error}\n"
+            QMessageBox.warning(self, journal.label, msg)
+            return
+        if len(journal):
+            self.last_batch = journal
+            self.undo_action.setText(f"Undo {journal.label}")
+            self.undo_action.setEnabled(True)
+        self.html_cache.clear()
+        self.refresh_known_tags()
+        self.perform_search()
+        self.statusBar().showMessage(f"{journal.label}: done", 3000)
 
-        menu.addAction(edit_action)
-        menu.addAction(delete_action)
-        menu.exec(self.recipe_list.mapToGlobal(position))
+    def run_batch(self, operation, *args):
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            journal = operation(*args)
+        finally:
+            QApplication.restoreOverrideCursor()
+        self.finish_batch(journal)
+
+    def bulk_delete(self, recipes):
+        reply = QMessageBox.question(
+            self,
+            "Delete Recipes",
+            f"Are you sure you want to delete {len(recipes)} recipes?\nYou can undo this with Edit > Undo.",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            self.run_batch(self.libraries.bulk_delete, recipes)
+
+    def bulk_add_tags(self, recipes):
+        text, ok = QInputDialog.getText(
+            self, "Add Tags", f"Tags to add to {len(recipes)} recipe(s) (comma-separated):"
+        )
+        tags = [t.strip() for t in text.split(",") if t.strip()]
+        if ok and tags:
+            self.run_batch(self.libraries.bulk_retag, recipes, tags, ())
+
+    def bulk_remove_tags(self, recipes):
+        present = sorted({t for r in recipes for t in r.tags})
+        if not present:
+            QMessageBox.information(self, "Remove Tags", "The selected recipes have no tags.")
+            return
+        tag, ok = QInputDialog.getItem(
+            self, "Remove Tags", f"Tag to remove from {len(recipes)} recipe(s):", present, 0, True
+        )
+        if ok and tag.strip():
+            self.run_batch(self.libraries.bulk_retag, recipes, (), [tag])
+
+    def bulk_export(self, recipes):
+        folder = QFileDialog.getExistingDirectory(self, f"Export {len(recipes)} Recipe(s) To")
+        if not folder:
+            return
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            written, failed = recipe_manager.export_recipes(recipes, folder)
+        finally:
+            QApplication.restoreOverrideCursor()
+        if failed:
+            msg = f"Exported {len(written)} recipe(s); these failed:\n"
+            for rid, error in failed[:20]:
+                msg += f" - {os.path.basename(rid)}: {error}\n"
+            QMessageBox.warning(self, "Export", msg)
+        else:
+            self.statusBar().showMessage(f"Exported {len(written)} recipe(s) to {folder}", 3000)
+
+    def undo_last_batch(self):
+        journal = self.last_batch
+        if journal is None:
+            return
+        self.last_batch = None
+        self.undo_action.setText("Undo")
+        self.undo_action.setEnabled(False)
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            undo = self.libraries.undo_batch(journal)
+        finally:
+            QApplication.restoreOverrideCursor()
+        if undo.failed:
+            msg = "Some recipes could not be restored:\n"
+            for rid, error in undo.failed[:20]:
+                msg += f" - {os.path.basename(rid)}: {error}\n"
+            QMessageBox.warning(self, undo.label, msg)
+        self.html_cache.clear()
+        self.refresh_known_tags()
+        self.perform_search()
 
     def edit_recipe(self, recipe_obj):
-        dialog = EditRecipeDialog(recipe_obj, self.all_known_tags, self)
+        dialog = EditRecipeDialog(
+            recipe_obj, self.all_known_tags, self, catalog=self.libraries.catalog_for(recipe_obj)
+        )
         if dialog.exec() == QDialog.Accepted:
-            # Reload recipes from disk so we see the updated file
-            self.recipes = recipe_manager.load_recipes()
-            # Also re-gather possible tags (in case user added new ones)
-            new_tags = set(self.settings["default_tags"])
-            for r in self.recipes:
-                for t in r.tags:
-                    new_tags.add(t.lower())
-            self.all_known_tags = sorted(new_tags)
+            # The catalog has already published the updated recipe
+            self.refresh_known_tags()
             self.perform_search()
 
     def delete_recipe(self, recipe_obj):
@@ -602,24 +1086,31 @@ class AMBROSIA(QMainWindow):
             QMessageBox.No
         )
         if reply == QMessageBox.Yes:
-            success = recipe_manager.delete_recipe(recipe_obj)
+            recipe_catalog = self.libraries.catalog_for(recipe_obj)
+            success = recipe_catalog is not None and recipe_catalog.delete_recipe(recipe_obj)
             if success:
                 QMessageBox.information(self, "Deleted", f"'{recipe_obj.title}' was deleted.")
-                self.recipes = recipe_manager.load_recipes()
+                self.refresh_known_tags()
                 self.perform_search()
 
     def open_add_dialog(self):
-        dialog = AddRecipeDialog(self.all_known_tags, self)
+        library = self.libraries.default_library()
+        if not library.loaded:
+            if not self.add_dialog_pending:
+                self.add_dialog_pending = True
+                self.statusBar().showMessage(f"Loading {library.name}...")
+                self.add_dialog_loader.start(library)
+            return
+        dialog = AddRecipeDialog(self.all_known_tags, self, catalog=library.ensure_loaded())
         if dialog.exec() == QDialog.Accepted:
-            self.recipes = recipe_manager.load_recipes()
-            # Also re-gather possible tags
-            new_tags = set(self.settings["default_tags"])
-            for r in self.recipes:
-                for t in r.tags:
-                    new_tags.add(t.lower())
-            self.all_known_tags = sorted(new_tags)
+            self.refresh_known_tags()
             self.perform_search()
 
+    def on_add_library_loaded(self, library_snapshot):
+        self.add_dialog_pending = False
+        self.statusBar().clearMessage()
+        self.open_add_dialog()
+
     def check_recipes(self):
         invalids = recipe_manager.validate_recipes(self.recipes)
         if not invalids:
@@ -632,6 +1123,50 @@ class AMBROSIA(QMainWindow):
                 msg += f" - {base_file}\n"
             QMessageBox.warning(self, "Malformed Recipes", msg)
 
+    def show_shopping_list(self):
+        """Combine the ingredients of every recipe currently listed."""
+        while self.search_stream is not None:
+            self.pump_search_stream(pages=1)
+        recipes = []
+        for row in range(self.recipe_list.count()):
+            recipe = self.recipe_list.item(row).data(Qt.UserRole)
+            if recipe is not None:
+                recipes.append(recipe)
+        if not recipes:
+            QMessageBox.information(self, "Shopping List", "No recipes are listed.")
+            return
+
+        scale, ok = QInputDialog.getDouble(
+            self, "Shopping List", f"Servings multiplier for {len(recipes)} recipe(s):",
+            1.0, 0.1, 1000.0, 1
+        )
+        if not ok:
+            return
+
+        try:
+            items = recipe_manager.build_shopping_list(recipes, scale=scale)
+        except RuntimeError as e:
+            QMessageBox.warning(self, "Shopping List", str(e))
+            return
+        if not items:
+            QMessageBox.information(self, "Shopping List", "The listed recipes have no ingredients.")
+            return
+
+        import shopping_list
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Shopping List")
+        dialog.resize(400, 500)
+        text = QTextEdit()
+        text.setReadOnly(True)
+        text.setPlainText(shopping_list.format_shopping_list(items))
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        buttons.rejected.connect(dialog.reject)
+        layout = QVBoxLayout()
+        layout.addWidget(text)
+        layout.addWidget(buttons)
+        dialog.setLayout(layout)
+        dialog.exec()
+
     def register_shortcuts(self):
         search_action = QAction(self)
         search_action.setShortcut(QKeySequence("Ctrl+F"))
@@ -0,0 +1,415 @@
+# libraries.py
+#
+# Several recipe libraries (folders or .ambr archives) searched as one.
+# They are configured in settings.json:
+#
+#   "libraries": [
+#       {"name": "Main", "path": "recipes", "enabled": true},
+#       {"name": "Site B", "path": "/srv/site_b/recipes", "enabled": true},
+#       {"name": "Archive", "path": "old.ambr", "enabled": false}
+#   ]
+#
+# Each library has its own catalog.Catalog, loaded on first use and indexed
+# in the background as usual. A search fans out to the enabled libraries on
+# a thread pool and merges their title-ordered results; a streaming search
+# keeps scanning each library on the pool one batch ahead of the merge.
+# library_of() tells which library a result came from. Disabled libraries
+# that are still loaded are unloaded, least recently used first, when the
+# process grows past the configured memory limit.
+
+import os
+import gc
+import sys
+import time
+import heapq
+import hashlib
+import threading
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import psutil
+except ImportError:  # optional; /proc and the Win32 API cover Linux and Windows without it
+    psutil = None
+
+import catalog
+import recipe_manager
+import settings_manager
+
+
+def _windows_working_set():
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    get_current_process = ctypes.windll.kernel32.GetCurrentProcess
+    get_current_process.restype = wintypes.HANDLE
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(
+        get_current_process(), ctypes.byref(counters), counters.cb
+    ):
+        return None
+    return counters.WorkingSetSize
+
+
+def resident_memory():
+    """
+    Resident set size of this process in bytes, or None where it cannot be
+    measured (macOS and other platforms without /proc, unless psutil is installed).
+    """
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    if sys.platform == "win32":
+        try:
+            return _windows_working_set()
+        except (OSError, AttributeError):
+            return None
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def _sort_key(recipe):
+    # Same order as CatalogSnapshot.recipe_list and search
+    return (recipe.title.lower(), recipe_manager.recipe_id(recipe))
+
+
+def _read_ahead(pool, batches):
+    """
+    The items of `batches` (an iterator of lists), with the next batch
+    always being produced on `pool` while the current one is consumed.
+    """
+    future = pool.submit(next, batches, None)
+    while True:
+        batch = future.result()
+        if batch is None:
+            return
+        future = pool.submit(next, batches, None)
+        yield from batch
+
+
+class Library:
+    def __init__(self, name, path, enabled=True):
+        self.name = name
+        self.path = path
+        self.enabled = enabled
+        self.catalog = None
+        self.last_used = 0.0
+        self._load_lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self.catalog is not None
+
+    def ensure_loaded(self):
+        """The library's Catalog, loading it on first use."""
+        self.last_used = time.monotonic()
+        with self._load_lock:
+            if self.catalog is None:
+                library_catalog = catalog.Catalog(self.path)
+                library_catalog.load()
+                self.catalog = library_catalog
+            return self.catalog
+
+    def load(self):
+        """ensure_loaded() returning the snapshot, so gui.CatalogLoader can load one library."""
+        return self.ensure_loaded().snapshot
+
+    def unload(self):
+        with self._load_lock:
+            self.catalog = None
+            if recipe_manager.is_archive(self.path):
+                import recipe_archive
+                # Otherwise the map, index, lock file and compactor stay behind
+                recipe_archive.close_archive(self.path)
+
+    def to_settings(self):
+        return {"name": self.name, "path": self.path, "enabled": self.enabled}
+
+
+class FederatedRecipes(Mapping):
+    """Read-only id -> Recipe view over the snapshots of several libraries."""
+    def __init__(self, parts):
+        self._parts = parts
+
+    def __getitem__(self, rid):
+        for _library, snapshot in self._parts:
+            recipe = snapshot.recipes.get(rid)
+            if recipe is not None:
+                return recipe
+        raise KeyError(rid)
+
+    def __iter__(self):
+        for _library, snapshot in self._parts:
+            yield from snapshot.recipes
+
+    def __len__(self):
+        return sum(len(snapshot.recipes) for _library, snapshot in self._parts)
+
+
+class FederatedSnapshot:
+    """
+    The current CatalogSnapshot of every enabled, loaded library, read
+    together. Offers the parts of the CatalogSnapshot interface the GUI
+    uses (recipes, recipe_list, known_tags, generation, file_stat, search,
+    iter_search).
+    """
+    def __init__(self, parts, pool):
+        self.parts = parts  # [(Library, CatalogSnapshot)]
+        self.recipes = FederatedRecipes(parts)
+        self._pool = pool
+        self._recipe_list = None
+        self._generation = None
+
+    def library_of(self, recipe):
+        """Name of the library `recipe` comes from, or None."""
+        rid = recipe_manager.recipe_id(recipe)
+        for library, snapshot in self.parts:
+            if rid in snapshot.recipes:
+                return library.name
+        return None
+
+    def file_stat(self, recipe):
+        """(mtime_ns, size) of the recipe's file as of loading, or None (archives)."""
+        rid = recipe_manager.recipe_id(recipe)
+        for _library, snapshot in self.parts:
+            if snapshot.file_stats is not None:
+                stat = snapshot.file_stats.get(rid)
+                if stat is not None:
+                    return stat
+        return None
+
+    def recipe_list(self):
+        if self._recipe_list is None:
+            self._recipe_list = list(heapq.merge(
+                *(snapshot.recipe_list() for _library, snapshot in self.parts), key=_sort_key
+            ))
+        return self._recipe_list
+
+    @property
+    def generation(self):
+        if self._generation is None:
+            digest = hashlib.sha1()
+            for library, snapshot in self.parts:
+                digest.update(f"{library.name}:{snapshot.generation}\n".encode("utf-8"))
+            self._generation = digest.hexdigest()
+        return self._generation
+
+    def known_tags(self):
+        tags = set()
+        for _library, snapshot in self.parts:
+            tags.update(snapshot.tag_index)
+        return sorted(tags)
+
+    def _fan_out(self, call):
+        # Query parsing and index evaluation run per library in parallel;
+        # a syntax error from any of them is raised here
+        futures = [self._pool.submit(call, snapshot) for _library, snapshot in self.parts]
+        return [future.result() for future in futures]
+
+    def search(self, search_query, selected_tags=None):
+        results = self._fan_out(lambda snapshot: snapshot.search(search_query, selected_tags))
+        return list(heapq.merge(*results, key=_sort_key))
+
+    def iter_search(self, search_query, selected_tags=None,
+                    batch_size=recipe_manager.SEARCH_BATCH_SIZE, offset=0, limit=None):
+        """
+        Merged, title-ordered batches. Each library is scanned on the pool,
+        one batch ahead of the merge and only as far as needed; the caller's
+        thread only merges.
+        """
+        streams = self._fan_out(
+            lambda snapshot: snapshot.iter_search(search_query, selected_tags, batch_size=batch_size)
+        )
+        merged = heapq.merge(*(_read_ahead(self._pool, s) for s in streams), key=_sort_key)
+        return recipe_manager.batched(merged, batch_size, offset, limit)
+
+
+class FederatedJournal:
+    """The per-library BatchJournals of one bulk operation across libraries."""
+    def __init__(self, label, parts):
+        self.label = label
+        self.parts = parts  # [(Library, BatchJournal)]
+
+    def __len__(self):
+        return sum(len(journal) for _library, journal in self.parts)
+
+    @property
+    def failed(self):
+        return [f for _library, journal in self.parts for f in journal.failed]
+
+
+class LibrarySet:
+    """
+    All configured libraries. Stands in for a single catalog.Catalog in the
+    GUI: load(), refresh() and `snapshot` cover the enabled libraries, and
+    writes are routed to the library that owns each recipe.
+    """
+    def __init__(self, libraries, memory_limit_mb=1024, max_workers=4):
+        self.libraries = libraries
+        self.memory_limit = memory_limit_mb * 1024 * 1024
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="library")
+        self._snapshot_key = None
+        self._snapshot = None
+        self._memory_warning_shown = False
+
+    @classmethod
+    def from_settings(cls, settings):
+        defaults = settings_manager.DEFAULT_SETTINGS
+        configured = settings.get("libraries") or defaults["libraries"]
+        libraries = []
+        paths, names = set(), set()
+        for entry in configured:
+            path = entry.get("path")
+            if not path or path in paths:
+                continue
+            paths.add(path)
+            base_name = entry.get("name") or os.path.basename(os.path.normpath(path))
+            name = base_name
+            counter = 2
+            while name in names:
+                name = f"{base_name} ({counter})"
+                counter += 1
+            names.add(name)
+            libraries.append(Library(name, path, entry.get("enabled", True)))
+        limit = settings.get("library_memory_limit_mb", defaults["library_memory_limit_mb"])
+        return cls(libraries, limit)
+
+    def to_settings(self):
+        return [library.to_settings() for library in self.libraries]
+
+    def enabled(self):
+        return [library for library in self.libraries if library.enabled]
+
+    def get(self, name):
+        for library in self.libraries:
+            if library.name == name:
+                return library
+        return None
+
+    @property
+    def snapshot(self):
+        parts = [(library, library.catalog.snapshot)
+                 for library in self.enabled() if library.catalog is not None]
+        key = tuple(id(snapshot) for _library, snapshot in parts)
+        if key != self._snapshot_key:
+            self._snapshot = FederatedSnapshot(parts, self._pool)
+            self._snapshot_key = key
+        return self._snapshot
+
+    def load(self):
+        """Load every enabled library not loaded yet, in parallel. Returns the snapshot."""
+        pending = [library for library in self.enabled() if not library.loaded]
+        for future in [self._pool.submit(library.ensure_loaded) for library in pending]:
+            future.result()
+        self.trim_memory()
+        return self.snapshot
+
+    def refresh(self):
+        for library in self.enabled():
+            if library.loaded:
+                library.catalog.refresh()
+        return self.snapshot
+
+    def set_enabled(self, name, enabled):
+        library = self.get(name)
+        if library is not None:
+            library.enabled = enabled
+            if enabled:
+                library.last_used = time.monotonic()
+
+    def trim_memory(self):
+        """
+        Unload disabled libraries, least recently used first, while the
+        process is over the memory limit. Returns the names unloaded.
+        """
+        rss = resident_memory()
+        if rss is None:
+            if not self._memory_warning_shown:
+                self._memory_warning_shown = True
+                print("Memory use cannot be measured on this platform (install psutil); "
+                      "disabled libraries stay loaded.")
+            return []
+        if rss <= self.memory_limit:
+            return []
+        unloaded = []
+        candidates = sorted(
+            (library for library in self.libraries if library.loaded and not library.enabled),
+            key=lambda library: library.last_used
+        )
+        for library in candidates:
+            library.unload()
+            unloaded.append(library.name)
+            gc.collect()
+            rss = resident_memory()
+            if rss is None or rss <= self.memory_limit:
+                break
+        return unloaded
+
+    # --- writes -------------------------------------------------------
+
+    def library_for(self, recipe):
+        rid = recipe_manager.recipe_id(recipe)
+        for library in self.libraries:
+            if library.catalog is not None and rid in library.catalog.snapshot.recipes:
+                return library
+        return None
+
+    def catalog_for(self, recipe):
+        """Catalog of the library that owns `recipe` (edits and deletes go there)."""
+        library = self.library_for(recipe)
+        return library.catalog if library is not None else None
+
+    def default_library(self):
+        """Library new recipes are added to: the first enabled one. May not be loaded yet."""
+        libraries = self.enabled() or self.libraries
+        return libraries[0]
+
+    def _by_library(self, recipes):
+        groups = {}
+        for recipe in recipes:
+            library = self.library_for(recipe)
+            if library is not None:
+                groups.setdefault(library.name, (library, []))[1].append(recipe)
+        return list(groups.values())
+
+    def _bulk(self, label, recipes, operation):
+        parts = []
+        for library, group in self._by_library(recipes):
+            parts.append((library, operation(library.catalog, group)))
+        journal = FederatedJournal(label, parts)
+        if journal.failed:
+            # Keep the batch all-or-nothing across libraries as well
+            for library, part in parts:
+                if not part.failed and len(part):
+                    library.catalog.undo_batch(part)
+        return journal
+
+    def bulk_delete(self, recipes):
+        return self._bulk(f"Delete {len(recipes)} recipe(s)", recipes,
+                          lambda c, group: c.bulk_delete(group))
+
+    def bulk_retag(self, recipes, add_tags=(), remove_tags=()):
+        return self._bulk(f"Retag {len(recipes)} recipe(s)", recipes,
+                          lambda c, group: c.bulk_retag(group, add_tags, remove_tags))
+
+    def undo_batch(self, journal):
+        parts = [(library, library.ensure_loaded().undo_batch(part)) for library, part in journal.parts]
+        return FederatedJournal(f"Undo {journal.label}", parts)
@@ -4,13 +4,35 @@ import sys
 import os
 from PySide6.QtWidgets import QApplication
 from gui import AMBROSIA
+import recipe_manager
+import settings_manager
+import stall_monitor
 
 def main():
-    # Make sure 'recipes' folder exists
-    if not os.path.exists("recipes"):
-        os.makedirs("recipes")
+    settings = settings_manager.load_settings()
+
+    # Make sure every configured library folder exists (archives create themselves)
+    for library in settings["libraries"]:
+        path = library.get("path")
+        if path and not recipe_manager.is_archive(path) and not os.path.exists(path):
+            os.makedirs(path)
 
     app = QApplication(sys.argv)
+
+    # Started before the window so a slow startup is measured too
+    if stall_monitor.is_enabled(settings):
+        monitor = stall_monitor.StallMonitor(threshold_ms=settings["stall_threshold_ms"], parent=app)
+        monitor.start()
+
+        def write_stall_reports():
+            monitor.stop()
+            monitor.write_reports()
+            report = monitor.report()
+            print(f"Stall monitor: {report['stall_count']} stall(s), {report['stalled_ms']} ms; "
+                  f"see {stall_monitor.REPORT_JSON} and {stall_monitor.REPORT_FOLDED}")
+
+        app.aboutToQuit.connect(write_stall_reports)
+
     window = AMBROSIA()
     window.show()
     sys.exit(app.exec())
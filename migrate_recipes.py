@@ -0,0 +1,13 @@
+# migrate_recipes.py
+
+import sys
+import recipe_manager
+
+def main():
+    # Convert a flat recipe folder to the sharded layout in place
+    recipe_folder = sys.argv[1] if len(sys.argv) > 1 else "recipes"
+    moved = recipe_manager.migrate_to_sharded(recipe_folder)
+    print(f"Moved {moved} recipe file(s) into shards under '{recipe_folder}'.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+# query.py
+#
+# Field-scoped boolean search queries:
+#
+#   pancakes                      phrase anywhere (title, description, ingredients)
+#   milk+egg / milk AND egg       both
+#   pancake, flour / a OR b       either
+#   NOT nuts                      exclude
+#   title:fluffy pancakes         phrase within one field
+#   tag:breakfast                 exact tag
+#   (tag:dinner OR tag:lunch) AND ingredient:rice AND NOT step:"deep fry"
+#
+# Fields: title, description, tag, ingredient, step. Adjacent words form one
+# phrase, as before; adjacent complete terms are ANDed. A query without
+# parentheses, quotes, field scopes or AND/OR/NOT keywords is read with the
+# original rules of recipe_manager.parse_search_input, so "a+b", "a, b" and
+# "fluffy breakfast" keep their meaning.
+#
+# Queries are evaluated against a catalog snapshot by a small planner: the
+# children of an AND are ordered by the estimated number of matches from the
+# token index, the most selective one is resolved through the index, and the
+# others are only checked against its survivors, stopping as soon as nothing
+# is left.
+
+import re
+
+import recipe_manager
+
+FIELD_ALIASES = {
+    "title": "title",
+    "description": "description", "desc": "description",
+    "tag": "tag", "tags": "tag",
+    "ingredient": "ingredient", "ingredients": "ingredient",
+    "step": "step", "steps": "step",
+}
+ANY_FIELD = "any"
+# Fields with a token index; "any" is the union of the first three
+INDEXED_FIELDS = ("title", "description", "ingredient", "step")
+
+_TOKEN_RE = re.compile(r'\s*(?:(\()|(\))|("[^"]*"?)|([+,])|([^\s()+,"]+))')
+_ADVANCED_RE = re.compile(
+    r'[()"]|(?-i:\b(?:AND|OR|NOT)\b)|\b(?:' + "|".join(FIELD_ALIASES) + r'):', re.IGNORECASE
+)
+_PIECE_RE = re.compile(r"[^\W_]+")
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+# --- field text -------------------------------------------------------
+
+def field_text(recipe, field):
+    """Lowercased text of one field of a recipe, built once per Recipe."""
+    if field == ANY_FIELD:
+        return recipe_manager.recipe_search_text(recipe)
+    cache = getattr(recipe, "_field_texts", None)
+    if cache is None:
+        cache = recipe._field_texts = {}
+    text = cache.get(field)
+    if text is None:
+        if field == "title":
+            text = recipe.title.lower()
+        elif field == "description":
+            text = recipe.description.lower()
+        elif field == "ingredient":
+            # Ingredients are stored with underscores for spaces
+            text = "\n".join(i.lower().replace("_", " ") for i in recipe.ingredients)
+        elif field == "step":
+            text = "\n".join(s.lower() for s in recipe.steps)
+        else:
+            raise QuerySyntaxError(f"Unknown field: {field}")
+        cache[field] = text
+    return text
+
+
+def index_tokens(recipe, field):
+    """Distinct index tokens (runs of letters/digits) of a field."""
+    return set(_PIECE_RE.findall(field_text(recipe, field)))
+
+
+# --- query tree -------------------------------------------------------
+
+class Term:
+    def __init__(self, field, text):
+        self.field = field
+        self.text = text.lower() if field != "ingredient" else text.lower().replace("_", " ")
+        if field == "tag":
+            self.text = self.text.strip()
+        self.pieces = _PIECE_RE.findall(self.text)
+
+    def __repr__(self):
+        return f"Term({self.field}:{self.text!r})"
+
+    def matches(self, recipe):
+        if self.field == "tag":
+            return self.text in recipe.tags
+        return self.text in field_text(recipe, self.field)
+
+    def estimate(self, ctx):
+        if self.field == "tag":
+            return len(ctx.snapshot.tag_index.get(self.text, ()))
+        if not self.pieces:
+            return ctx.size
+        return min(ctx.piece_estimate(self.field, p) for p in self.pieces)
+
+    def evaluate(self, ctx, within=None):
+        if within is not None and len(within) <= self.estimate(ctx):
+            # Cheaper to check the survivors than to touch the index
+            return {rid for rid in within if self.matches(ctx.recipes[rid])}
+        if self.field == "tag":
+            candidates = ctx.snapshot.tag_index.get(self.text, frozenset())
+            return set(candidates & within) if within is not None else set(candidates)
+        candidates = ctx.term_candidates(self.field, self.pieces)
+        if within is not None:
+            candidates = candidates & within
+        return {rid for rid in candidates if self.matches(ctx.recipes[rid])}
+
+
+class And:
+    def __init__(self, children):
+        self.children = children
+
+    def __repr__(self):
+        return f"And({self.children})"
+
+    def matches(self, recipe):
+        return all(c.matches(recipe) for c in self.children)
+
+    def estimate(self, ctx):
+        return min(c.estimate(ctx) for c in self.children)
+
+    def evaluate(self, ctx, within=None):
+        result = within
+        for child in sorted(self.children, key=lambda c: c.estimate(ctx)):
+            result = child.evaluate(ctx, result)
+            if not result:
+                return set()
+        return result
+
+
+class Or:
+    def __init__(self, children):
+        self.children = children
+
+    def __repr__(self):
+        return f"Or({self.children})"
+
+    def matches(self, recipe):
+        return any(c.matches(recipe) for c in self.children)
+
+    def estimate(self, ctx):
+        return min(ctx.size, sum(c.estimate(ctx) for c in self.children))
+
+    def evaluate(self, ctx, within=None):
+        result = set()
+        remaining = within
+        for child in self.children:
+            found = child.evaluate(ctx, remaining)
+            result |= found
+            if remaining is not None:
+                remaining = remaining - found
+                if not remaining:
+                    break
+        return result
+
+
+class Not:
+    def __init__(self, child):
+        self.child = child
+
+    def __repr__(self):
+        return f"Not({self.child})"
+
+    def matches(self, recipe):
+        return not self.child.matches(recipe)
+
+    def estimate(self, ctx):
+        # Child estimates are upper bounds, so size minus one says nothing
+        # useful; treating NOT as unselective makes an AND apply it last
+        return ctx.size
+
+    def evaluate(self, ctx, within=None):
+        base = within if within is not None else set(ctx.recipes)
+        return base - self.child.evaluate(ctx, base)
+
+
+class MatchAll:
+    def __repr__(self):
+        return "MatchAll()"
+
+    def matches(self, recipe):
+        return True
+
+    def estimate(self, ctx):
+        return ctx.size
+
+    def evaluate(self, ctx, within=None):
+        return set(within) if within is not None else set(ctx.recipes)
+
+
+# --- parsing ----------------------------------------------------------
+
+def is_advanced(query):
+    return bool(_ADVANCED_RE.search(query))
+
+
+def _legacy_tree(query):
+    mode, terms = recipe_manager.parse_search_input(query)
+    if mode == "NONE":
+        return MatchAll()
+    if mode == "PHRASE":
+        return Term(ANY_FIELD, terms[0])
+    nodes = [Term(ANY_FIELD, t) for t in terms]
+    if not nodes:
+        # "+" alone matched everything and "," alone nothing
+        return MatchAll() if mode == "AND" else Or([])
+    if len(nodes) == 1:
+        return nodes[0]
+    return And(nodes) if mode == "AND" else Or(nodes)
+
+
+def _tokenize(query):
+    tokens = []
+    pos = 0
+    query = query.rstrip()
+    while pos < len(query):
+        match = _TOKEN_RE.match(query, pos)
+        if not match or match.end() == pos:
+            raise QuerySyntaxError(f"Unexpected character at {pos}: {query[pos]!r}")
+        pos = match.end()
+        lp, rp, quoted, op, word = match.groups()
+        if lp:
+            tokens.append(("LP", lp))
+        elif rp:
+            tokens.append(("RP", rp))
+        elif quoted:
+            if len(quoted) < 2 or not quoted.endswith('"'):
+                raise QuerySyntaxError("Unterminated quote")
+            tokens.append(("QUOTED", quoted[1:-1]))
+        elif op:
+            tokens.append(("AND" if op == "+" else "OR", op))
+        elif word in ("AND", "OR", "NOT"):
+            tokens.append((word, word))
+        else:
+            name, colon, rest = word.partition(":")
+            if colon and name.lower() in FIELD_ALIASES:
+                tokens.append(("FIELD", FIELD_ALIASES[name.lower()]))
+                if rest:
+                    tokens.append(("WORD", rest))
+            else:
+                tokens.append(("WORD", word))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            return MatchAll()
+        node = self.parse_or(ANY_FIELD)
+        if self.peek() is not None:
+            raise QuerySyntaxError(f"Unexpected {self.tokens[self.pos][1]!r}")
+        return node
+
+    def parse_or(self, field):
+        children = [self.parse_and(field)]
+        while self.peek() == "OR":
+            self.take()
+            children.append(self.parse_and(field))
+        return children[0] if len(children) == 1 else Or(children)
+
+    def parse_and(self, field):
+        children = [self.parse_not(field)]
+        while True:
+            kind = self.peek()
+            if kind == "AND":
+                self.take()
+                children.append(self.parse_not(field))
+            elif kind in ("LP", "FIELD", "QUOTED", "WORD", "NOT"):
+                # Juxtaposed terms are ANDed
+                children.append(self.parse_not(field))
+            else:
+                break
+        return children[0] if len(children) == 1 else And(children)
+
+    def parse_not(self, field):
+        if self.peek() == "NOT":
+            self.take()
+            return Not(self.parse_not(field))
+        return self.parse_primary(field)
+
+    def parse_primary(self, field):
+        kind = self.peek()
+        if kind == "FIELD":
+            field = self.take()[1]
+            kind = self.peek()
+        if kind == "LP":
+            self.take()
+            node = self.parse_or(field)
+            if self.peek() != "RP":
+                raise QuerySyntaxError("Missing closing parenthesis")
+            self.take()
+            return node
+        if kind == "QUOTED":
+            return Term(field, self.take()[1])
+        if kind == "WORD":
+            words = [self.take()[1]]
+            while self.peek() == "WORD":
+                words.append(self.take()[1])
+            return Term(field, " ".join(words))
+        found = self.tokens[self.pos][1] if kind else "end of query"
+        raise QuerySyntaxError(f"Expected a search term, found {found!r}")
+
+
+def parse_query(query):
+    """Parse a search string into a query tree. Raises QuerySyntaxError."""
+    query = query.strip()
+    if not is_advanced(query):
+        return _legacy_tree(query)
+    return _Parser(_tokenize(query)).parse()
+
+
+# --- evaluation -------------------------------------------------------
+
+class QueryContext:
+    """Index access and per-query memo for evaluating against one snapshot."""
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.recipes = snapshot.recipes
+        self.size = len(snapshot.recipes)
+        self.index = snapshot.term_index()
+        self._piece_postings = {}
+
+    def _fields(self, field):
+        return ("title", "description", "ingredient") if field == ANY_FIELD else (field,)
+
+    def _postings(self, field, piece):
+        """Postings of every indexed token containing `piece` (substring match)."""
+        key = (field, piece)
+        postings = self._piece_postings.get(key)
+        if postings is None:
+            postings = []
+            for f in self._fields(field):
+                for token, ids in self.index.vocabulary(f, piece):
+                    postings.append(ids)
+            self._piece_postings[key] = postings
+        return postings
+
+    def piece_estimate(self, field, piece):
+        return min(self.size, sum(len(ids) for ids in self._postings(field, piece)))
+
+    def term_candidates(self, field, pieces):
+        if not pieces:
+            return set(self.recipes)
+        ordered = sorted(pieces, key=lambda p: self.piece_estimate(field, p))
+        candidates = None
+        for piece in ordered:
+            found = set().union(*self._postings(field, piece))
+            candidates = found if candidates is None else candidates & found
+            if not candidates:
+                break
+        return candidates
+
+
+def evaluate(tree, snapshot):
+    """Ids of the recipes in `snapshot` matching `tree`."""
+    return tree.evaluate(QueryContext(snapshot))
+
+
+def is_selective(tree, ctx):
+    """Whether the index is worth it; broad queries are cheaper as one scan."""
+    return tree.estimate(ctx) * 4 <= ctx.size
@@ -0,0 +1,448 @@
+# recipe_archive.py
+
+import os
+import sys
+import json
+import mmap
+import struct
+import threading
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import recipe_manager
+
+# Archive layout:
+#   MAGIC, then a sequence of records
+#   record = header (op, key length, payload length, crc32 of key+payload),
+#            key bytes (utf-8), payload bytes (recipe in the .txt format, utf-8)
+# A PUT supersedes any earlier record with the same key; a TOMBSTONE deletes it.
+# The offset index lives next to the log in "<archive>.idx" and records how far
+# into the log it is valid, so reopening only replays the tail.
+# While a process has the archive open it holds a lock on "<archive>.lock", so
+# the app and the command line tools below never write to it at the same time.
+MAGIC = b"AMBRARC1"
+OP_PUT = 1
+OP_TOMBSTONE = 2
+RECORD_HEADER = struct.Struct("<BHII")
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+def open_archive(path):
+    """Return the shared RecipeArchive for `path`, opening it on first use."""
+    key = os.path.abspath(path)
+    with _archives_lock:
+        archive = _archives.get(key)
+        if archive is None:
+            archive = RecipeArchive(path)
+            _archives[key] = archive
+        return archive
+
+
+def close_archive(path):
+    """Close the archive for `path` if open_archive has it open (frees the map, releases the lock)."""
+    with _archives_lock:
+        archive = _archives.get(os.path.abspath(path))
+    if archive is not None:
+        archive.close()
+
+
+def close_all():
+    """Close every archive opened by open_archive (saves their indexes, releases the locks)."""
+    with _archives_lock:
+        archives = list(_archives.values())
+    for archive in archives:
+        archive.close()
+
+
+def _lock_file(path):
+    f = open(path, "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+class RecipeArchive:
+    """
+    Append-only, memory-mapped recipe log with an offset index.
+    Writes are appends and tombstones; compact() rewrites the live records
+    into a fresh log to reclaim dead space.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.lock_path = path + ".lock"
+        self.dead_bytes = 0
+        self._index = {}  # key -> (payload offset, payload length, record length)
+        self._lock = threading.RLock()
+        self._file = None
+        self._mmap = None
+        self._compactor = None
+        self._stop_compactor = threading.Event()
+
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        self._lock_file = _lock_file(self.lock_path)
+        if self._lock_file is None:
+            raise ValueError(f"{path} is in use by another process")
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "wb") as f:
+                f.write(MAGIC)
+        try:
+            self._open_log()
+            self._load_index()
+        except Exception:
+            self._close_log()
+            self._release_lock()
+            raise
+
+    def _release_lock(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    # --- log access -----------------------------------------------------
+
+    def _open_log(self):
+        self._file = open(self.path, "r+b")
+        if self._file.read(len(MAGIC)) != MAGIC:
+            self._file.close()
+            raise ValueError(f"{self.path} is not a recipe archive")
+        self._file.seek(0, os.SEEK_END)
+        self._remap()
+
+    def _remap(self):
+        old = self._mmap
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if old is not None:
+            try:
+                old.close()
+            except BufferError:
+                # A caller still holds a slice; the map is freed with it
+                pass
+
+    def _close_log(self):
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _log_size(self):
+        return self._file.seek(0, os.SEEK_END)
+
+    def _scan(self, mm, start, end):
+        """
+        Yield (op, key, payload offset, payload length, record length) from
+        start to end, stopping at the first record that is cut off or corrupt.
+        """
+        pos = start
+        while pos + RECORD_HEADER.size <= end:
+            op, key_len, payload_len, crc = RECORD_HEADER.unpack_from(mm, pos)
+            body_start = pos + RECORD_HEADER.size
+            body_end = body_start + key_len + payload_len
+            if op not in (OP_PUT, OP_TOMBSTONE) or body_end > end:
+                break
+            if zlib.crc32(mm[body_start:body_end]) != crc:
+                break
+            key = str(mm[body_start:body_start + key_len], "utf-8")
+            yield op, key, body_start + key_len, payload_len, body_end - pos
+            pos = body_end
+
+    def _apply(self, index, op, key, offset, length, record_len):
+        previous = index.pop(key, None)
+        if previous is not None:
+            self.dead_bytes += previous[2]
+        if op == OP_PUT:
+            index[key] = (offset, length, record_len)
+        else:
+            self.dead_bytes += record_len
+
+    def _load_index(self):
+        start = len(MAGIC)
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data["log_size"] <= len(self._mmap):
+                    self._index = {k: tuple(v) for k, v in data["entries"].items()}
+                    self.dead_bytes = data["dead_bytes"]
+                    start = data["log_size"]
+            except Exception as e:
+                print(f"Rebuilding archive index for {self.path}: {e}")
+                self._index = {}
+                self.dead_bytes = 0
+
+        end = len(self._mmap)
+        valid_end = start
+        for op, key, offset, length, record_len in self._scan(self._mmap, start, end):
+            self._apply(self._index, op, key, offset, length, record_len)
+            valid_end = offset + length
+        if valid_end < end:
+            # Torn write from a crash. Cut it off, or new records would be
+            # appended after it and lost again on the next open
+            print(f"Recipe archive {self.path}: discarding {end - valid_end} trailing byte(s)")
+            self._mmap.close()
+            self._file.truncate(valid_end)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.seek(0, os.SEEK_END)
+            self._remap()
+
+    def save_index(self):
+        """Persist the offset index atomically."""
+        with self._lock:
+            data = {
+                "log_size": self._log_size(),
+                "dead_bytes": self.dead_bytes,
+                "entries": self._index,
+            }
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.index_path)
+
+    def _append(self, op, key, payload=b""):
+        key_bytes = key.encode("utf-8")
+        body = key_bytes + payload
+        header = RECORD_HEADER.pack(op, len(key_bytes), len(payload), zlib.crc32(body))
+        offset = self._log_size()
+        self._file.write(header + body)
+        self._file.flush()
+        record_len = RECORD_HEADER.size + len(body)
+        payload_offset = offset + RECORD_HEADER.size + len(key_bytes)
+        self._apply(self._index, op, key, payload_offset, len(payload), record_len)
+
+    # --- public API -----------------------------------------------------
+
+    def keys(self):
+        with self._lock:
+            return list(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def get_bytes(self, key):
+        """Zero-copy view of a recipe's .txt payload, or None if missing."""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            offset, length, _ = entry
+            if offset + length > len(self._mmap):
+                self._remap()
+            return memoryview(self._mmap)[offset:offset + length]
+
+    def _recipe_from_view(self, key, view):
+        recipe = recipe_manager.parse_recipe_bytes(bytes(view))
+        recipe.archive = self.path
+        recipe.archive_key = key
+        return recipe
+
+    def get_recipe(self, key):
+        view = self.get_bytes(key)
+        if view is None:
+            return None
+        with view:
+            return self._recipe_from_view(key, view)
+
+    def recipes(self):
+        with self._lock:
+            if self._log_size() > len(self._mmap):
+                self._remap()
+            # Exporting the view under the lock keeps _remap from closing the map
+            view = memoryview(self._mmap)
+            entries = list(self._index.items())
+        recipes = []
+        with view:
+            for key, (offset, length, _) in entries:
+                with view[offset:offset + length] as payload:
+                    recipes.append(self._recipe_from_view(key, payload))
+        return recipes
+
+    def new_key(self, slug):
+        with self._lock:
+            key = slug
+            counter = 2
+            while key in self._index:
+                key = f"{slug}_{counter}"
+                counter += 1
+            return key
+
+    def put(self, key, text):
+        with self._lock:
+            self._append(OP_PUT, key, text.encode("utf-8"))
+
+    def delete(self, key):
+        with self._lock:
+            if key not in self._index:
+                return False
+            self._append(OP_TOMBSTONE, key)
+            return True
+
+    def dead_ratio(self):
+        with self._lock:
+            size = self._log_size() - len(MAGIC)
+            return self.dead_bytes / size if size else 0.0
+
+    def compact(self):
+        """
+        Rewrite the live records into a new log and swap it in.
+        The bulk copy runs without the lock, from a private map that readers
+        remapping meanwhile cannot close; writes made meanwhile are replayed
+        from the old tail before the swap.
+        """
+        with self._lock:
+            mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            snapshot_size = len(mm)
+            entries = sorted(self._index.items(), key=lambda item: item[1][0])
+
+        tmp_path = self.path + ".compact"
+        new_index = {}
+        with mm, open(tmp_path, "wb") as out:
+            out.write(MAGIC)
+            pos = len(MAGIC)
+            for key, (offset, length, record_len) in entries:
+                record_start = offset + length - record_len
+                out.write(mm[record_start:offset + length])
+                new_index[key] = (pos + record_len - length, length, record_len)
+                pos += record_len
+
+            with self._lock:
+                self._remap()
+                tail_end = len(self._mmap)
+                self.dead_bytes = 0
+                for op, key, offset, length, record_len in self._scan(self._mmap, snapshot_size, tail_end):
+                    record_start = offset + length - record_len
+                    out.write(self._mmap[record_start:offset + length])
+                    self._apply(new_index, op, key, pos + record_len - length, length, record_len)
+                    pos += record_len
+                out.flush()
+                os.fsync(out.fileno())
+
+                self._close_log()
+                # A stale index must never be paired with the new log
+                if os.path.exists(self.index_path):
+                    os.remove(self.index_path)
+                os.replace(tmp_path, self.path)
+                self._index = new_index
+                self._open_log()
+                self.save_index()
+
+    def start_background_compaction(self, interval=30.0, min_dead_ratio=0.5):
+        """Compact on a daemon thread whenever dead space passes `min_dead_ratio`."""
+        if self._compactor is not None:
+            return
+
+        def run():
+            while not self._stop_compactor.wait(interval):
+                if self.dead_ratio() >= min_dead_ratio:
+                    try:
+                        self.compact()
+                    except Exception as e:
+                        print(f"Archive compaction failed for {self.path}: {e}")
+
+        self._stop_compactor.clear()
+        self._compactor = threading.Thread(target=run, name="archive-compactor", daemon=True)
+        self._compactor.start()
+
+    def stop_background_compaction(self):
+        if self._compactor is not None:
+            self._stop_compactor.set()
+            self._compactor.join()
+            self._compactor = None
+
+    def close(self):
+        self.stop_background_compaction()
+        with self._lock:
+            if self._file is not None:
+                self.save_index()
+                self._close_log()
+                self._release_lock()
+        with _archives_lock:
+            _archives.pop(os.path.abspath(self.path), None)
+
+    # --- .txt interchange -----------------------------------------------
+
+    def import_from_folder(self, recipe_folder="recipes"):
+        """Append every .txt recipe under `recipe_folder` (flat or sharded). Returns the count."""
+        count = 0
+        for root, _dirs, files in os.walk(recipe_folder):
+            for file_name in files:
+                if not file_name.lower().endswith(".txt"):
+                    continue
+                with open(os.path.join(root, file_name), "r", encoding="utf-8") as f:
+                    text = f.read()
+                self.put(self.new_key(os.path.splitext(file_name)[0]), text)
+                count += 1
+        self.save_index()
+        return count
+
+    def export_to_folder(self, recipe_folder="recipes"):
+        """Write every live recipe back out as <key>.txt. Returns the count."""
+        if not os.path.exists(recipe_folder):
+            os.makedirs(recipe_folder)
+        count = 0
+        for key in self.keys():
+            view = self.get_bytes(key)
+            if view is None:
+                continue
+            with view, open(os.path.join(recipe_folder, key + ".txt"), "wb") as f:
+                f.write(view)
+            count += 1
+        return count
+
+
+def main():
+    usage = (
+        "usage: python recipe_archive.py import ARCHIVE FOLDER\n"
+        "       python recipe_archive.py export ARCHIVE FOLDER\n"
+        "       python recipe_archive.py compact ARCHIVE"
+    )
+    if len(sys.argv) < 3 or sys.argv[1] not in ("import", "export", "compact"):
+        print(usage)
+        sys.exit(2)
+
+    command, path = sys.argv[1], sys.argv[2]
+    try:
+        archive = open_archive(path)
+    except ValueError as e:
+        # Also raised while the app has the archive open; close it first
+        print(e)
+        sys.exit(1)
+    if command == "compact":
+        before = archive._log_size()
+        archive.compact()
+        print(f"Compacted {path}: {before} -> {archive._log_size()} bytes")
+    elif len(sys.argv) < 4:
+        print(usage)
+        sys.exit(2)
+    elif command == "import":
+        print(f"Imported {archive.import_from_folder(sys.argv[3])} recipe(s) into {path}")
+    else:
+        print(f"Exported {archive.export_to_folder(sys.argv[3])} recipe(s) to {sys.argv[3]}")
+    archive.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,22 @@
 # recipe_manager.py
 
 import os
+import hashlib
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import settings_manager
+
+# A folder containing this marker file stores new recipes in hash-prefixed
+# shard subdirectories (recipes/3f/pancakes.txt) instead of one flat folder.
+SHARD_MARKER = ".sharded"
+SHARD_PREFIX_LEN = 2
+
+# A recipe_folder ending in this suffix is a single-file RecipeArchive
+ARCHIVE_SUFFIX = ".ambr"
+
+# Default number of results per batch from the streaming search functions
+SEARCH_BATCH_SIZE = 200
 
 class Recipe:
     def __init__(
@@ -11,7 +27,9 @@ class Recipe:
         steps, 
         tags=None, 
         filename=None,
-        is_valid=True
+        is_valid=True,
+        archive=None,
+        archive_key=None
     ):
         self.title = title
         self.description = description
@@ -20,6 +38,15 @@ class Recipe:
         self.tags = tags if tags else []  # list of strings
         self.filename = filename
         self.is_valid = is_valid
+        # Set instead of filename for recipes stored in a RecipeArchive
+        self.archive = archive
+        self.archive_key = archive_key
+
+def recipe_id(recipe):
+    """Stable identifier of a recipe within its library: file path or archive key."""
+    if recipe.archive:
+        return f"{recipe.archive}::{recipe.archive_key}"
+    return recipe.filename or recipe.title
 
 def parse_search_input(search_input):
     query = search_input.strip()
@@ -37,83 +64,203 @@ def parse_search_input(search_input):
     else:
         return "PHRASE", [query.lower()]
 
-def load_recipes(recipe_folder="recipes"):
-    recipes = []
-    if not os.path.exists(recipe_folder):
-        os.makedirs(recipe_folder)
+def is_sharded(recipe_folder="recipes"):
+    return os.path.exists(os.path.join(recipe_folder, SHARD_MARKER))
 
-    for file_name in os.listdir(recipe_folder):
-        if file_name.lower().endswith(".txt"):
-            file_path = os.path.join(recipe_folder, file_name)
-            recipe = parse_recipe_file(file_path)
-            if recipe is not None:
-                recipes.append(recipe)
-    return recipes
-
-def parse_recipe_file(file_path):
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-
-        title = ""
-        description = ""
-        tags = []
-        ingredients = []
-        steps = []
-        mode = None
-        is_valid = True
-
-        for line in lines:
-            line_stripped = line.strip()
+def _is_shard_name(name):
+    if len(name) != SHARD_PREFIX_LEN:
+        return False
+    return all(c in "0123456789abcdef" for c in name)
 
-            if line_stripped.startswith("Title:"):
-                title = line_stripped.replace("Title:", "").strip()
-                continue
+def _shard_for(file_name):
+    stem = os.path.splitext(file_name)[0]
+    return hashlib.sha1(stem.encode("utf-8")).hexdigest()[:SHARD_PREFIX_LEN]
 
-            if line_stripped.startswith("Description:"):
-                description = line_stripped.replace("Description:", "").strip()
-                continue
+def _load_recipe_dir(folder):
+    recipes = []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.name.lower().endswith(".txt") and entry.is_file():
+                recipe = parse_recipe_file(entry.path)
+                if recipe is not None:
+                    recipes.append(recipe)
+    return recipes
 
-            if line_stripped.startswith("Tags:"):
-                tags_part = line_stripped.replace("Tags:", "").strip()
-                # Split by comma
-                tags = [tag.strip().lower() for tag in tags_part.split(',') if tag.strip()]
-                continue
+def is_archive(recipe_folder):
+    return recipe_folder.lower().endswith(ARCHIVE_SUFFIX)
+
+def load_recipes(recipe_folder="recipes", max_workers=8):
+    """
+    Load every recipe in `recipe_folder`. Flat files in the folder itself are
+    always read; shard subdirectories (if any) are walked in parallel.
+    `recipe_folder` may also be the path of a .ambr archive.
+    """
+    if is_archive(recipe_folder):
+        import recipe_archive
+        try:
+            return recipe_archive.open_archive(recipe_folder).recipes()
+        except ValueError as e:
+            print(f"Failed to open recipe archive: {e}")
+            return []
 
-            if line_stripped.startswith("Ingredients:"):
-                mode = "ingredients"
-                continue
+    if not os.path.exists(recipe_folder):
+        os.makedirs(recipe_folder)
 
-            if line_stripped.startswith("Steps:"):
-                mode = "steps"
-                continue
+    recipes = _load_recipe_dir(recipe_folder)
 
-            if mode == "ingredients" and line_stripped.startswith("- "):
-                ingredient_line = line_stripped.replace("- ", "").strip()
-                if ingredient_line:
-                    ingredients.append(ingredient_line)
-                continue
+    shard_dirs = []
+    with os.scandir(recipe_folder) as entries:
+        for entry in entries:
+            if _is_shard_name(entry.name) and entry.is_dir():
+                shard_dirs.append(entry.path)
+    shard_dirs.sort()
 
-            if mode == "steps" and line_stripped:
-                steps.append(line_stripped)
-                continue
+    if shard_dirs:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for shard_recipes in pool.map(_load_recipe_dir, shard_dirs):
+                recipes.extend(shard_recipes)
+    return recipes
 
-        if not title or not description:
-            is_valid = False
-        if len(description) < 30:
-            is_valid = False
-        if not steps:
-            is_valid = False
+def scan_recipe_files(recipe_folder="recipes"):
+    """
+    Map every .txt recipe path in `recipe_folder` (flat and sharded) to its
+    (mtime_ns, size), without reading any file contents.
+    """
+    stats = {}
+    if not os.path.exists(recipe_folder):
+        return stats
+
+    folders = [recipe_folder]
+    with os.scandir(recipe_folder) as entries:
+        folders.extend(e.path for e in entries if _is_shard_name(e.name) and e.is_dir())
+    for folder in folders:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith(".txt") and entry.is_file():
+                    st = entry.stat()
+                    stats[entry.path] = (st.st_mtime_ns, st.st_size)
+    return stats
+
+def catalog_generation(recipe_folder="recipes", file_stats=None):
+    """
+    Cheap fingerprint of a library's on-disk state, built from file names,
+    sizes and mtimes without parsing anything. It changes whenever a recipe
+    is added, edited or removed, so cached results can be tied to it.
+    """
+    digest = hashlib.sha1()
+    if is_archive(recipe_folder):
+        if os.path.exists(recipe_folder):
+            st = os.stat(recipe_folder)
+            digest.update(f"{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+        return digest.hexdigest()
+
+    if file_stats is None:
+        file_stats = scan_recipe_files(recipe_folder)
+    for path in sorted(file_stats):
+        mtime_ns, size = file_stats[path]
+        digest.update(f"{path}:{size}:{mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+def refresh_recipes(recipes_by_path, file_stats, recipe_folder="recipes"):
+    """
+    Bring a previously loaded folder catalog up to date by re-parsing only the
+    files whose mtime or size changed. `recipes_by_path` and `file_stats` are
+    the results of an earlier call (start with empty dicts for a full load).
+    Returns (recipes_by_path, file_stats, changed_paths, removed_paths).
+    """
+    new_stats = scan_recipe_files(recipe_folder)
+    removed = set(file_stats) - set(new_stats)
+    changed = {path for path, stat in new_stats.items() if file_stats.get(path) != stat}
+
+    recipes = {path: r for path, r in recipes_by_path.items() if path not in removed}
+    for path in changed:
+        recipe = parse_recipe_file(path)
+        if recipe is not None:
+            recipes[path] = recipe
+    return recipes, new_stats, changed, removed
+
+def _open_new_recipe_file(folder, slug):
+    """
+    Create a new recipe file exclusively so two recipes with the same title
+    never overwrite each other: pancakes.txt, pancakes_2.txt, ...
+    """
+    if not os.path.exists(folder):
+        os.makedirs(folder, exist_ok=True)
+    counter = 1
+    while True:
+        suffix = "" if counter == 1 else f"_{counter}"
+        file_path = os.path.join(folder, f"{slug}{suffix}.txt")
+        try:
+            return file_path, open(file_path, "x", encoding="utf-8")
+        except FileExistsError:
+            counter += 1
+
+def migrate_to_sharded(recipe_folder="recipes"):
+    """
+    Convert a flat recipe folder to the sharded layout in place.
+    Moves never replace an existing file, and load_recipes reads both layouts,
+    so an interrupted migration leaves the folder readable; just run it again.
+    Returns the number of files moved.
+    """
+    if not os.path.exists(recipe_folder):
+        os.makedirs(recipe_folder)
 
-        return Recipe(
-            title=title, 
-            description=description, 
-            ingredients=ingredients, 
-            steps=steps,
-            tags=tags,
-            filename=file_path,
-            is_valid=is_valid
-        )
+    # Mark first so recipes added while migrating already go to shards
+    with open(os.path.join(recipe_folder, SHARD_MARKER), "a", encoding="utf-8"):
+        pass
+
+    moved = 0
+    with os.scandir(recipe_folder) as entries:
+        flat_files = [e for e in entries if e.name.lower().endswith(".txt") and e.is_file()]
+
+    for entry in flat_files:
+        shard_dir = os.path.join(recipe_folder, _shard_for(entry.name))
+        os.makedirs(shard_dir, exist_ok=True)
+        target = os.path.join(shard_dir, entry.name)
+        stem = os.path.splitext(entry.name)[0]
+        counter = 1
+        while True:
+            try:
+                _move_no_clobber(entry.path, target)
+                break
+            except FileExistsError:
+                if os.path.samefile(entry.path, target):
+                    # An interrupted run linked the file but did not unlink the flat name
+                    os.unlink(entry.path)
+                    break
+                counter += 1
+                target = os.path.join(shard_dir, f"{stem}_{counter}.txt")
+        moved += 1
+    return moved
+
+
+def _move_no_clobber(src, dst):
+    """Move `src` to `dst`, raising FileExistsError rather than replacing `dst`."""
+    if os.name == "nt":
+        # Windows rename already refuses to replace an existing file
+        os.rename(src, dst)
+        return
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        raise
+    except OSError:
+        # No hard links on this filesystem: claim the name, then rename onto the claim
+        with open(dst, "x"):
+            pass
+        os.replace(src, dst)
+        return
+    os.unlink(src)
+
+# Raised by strict parsing; the message names the offending line
+class RecipeFormatError(ValueError):
+    pass
+
+def parse_recipe_file(file_path, strict=False):
+    try:
+        with open(file_path, "rb") as f:
+            data = f.read()
+        return parse_recipe_bytes(data, file_path, strict)
 
     except Exception as e:
         print(f"Error parsing file {file_path}: {e}")
@@ -128,38 +275,182 @@ def parse_recipe_file(file_path):
             is_valid=False
         )
 
-def search_recipes(recipes, search_query, selected_tags=None):
-    mode, terms = parse_search_input(search_query)
-    if selected_tags is None:
-        selected_tags = []
-
-    def has_all_tags(recipe, tags_list):
-        return all(t.lower() in recipe.tags for t in tags_list if t.strip())
+def parse_recipe_bytes(data, file_path=None, strict=False):
+    """
+    Parse a recipe in the .txt format from its raw UTF-8 bytes.
 
-    filtered_by_tags = [r for r in recipes if has_all_tags(r, selected_tags)]
+    The file is decoded once and parsed in one pass over its lines; prefixes
+    are sliced off rather than replaced.
 
-    if mode == "NONE":
-        return filtered_by_tags
+    Lenient mode (the default) reads what it can, like the app always has:
+    unknown lines are skipped, the last Title:/Description:/Tags: line wins
+    and undecodable bytes become U+FFFD. Strict mode raises RecipeFormatError
+    for invalid UTF-8, text outside a section, ingredient lines without the
+    "- " marker and repeated headers.
+    """
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError as e:
+        if strict:
+            raise RecipeFormatError(f"not valid UTF-8 at byte {e.start}") from None
+        text = data.decode("utf-8", "replace")
+    title = ""
+    description = ""
+    tags = []
+    ingredients = []
+    steps = []
+    seen = set()
+    mode = None
+
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line:
+            continue
+
+        # Only lines starting with one of these letters can be headers
+        if line[0] in "TDIS":
+            if line.startswith("Title:"):
+                header = "Title:"
+                title = line[6:].strip()
+            elif line.startswith("Description:"):
+                header = "Description:"
+                description = line[12:].strip()
+            elif line.startswith("Tags:"):
+                header = "Tags:"
+                tags = [t.strip().lower() for t in line[5:].split(",") if t.strip()]
+            elif line.startswith("Ingredients:"):
+                header = "Ingredients:"
+                mode = "ingredients"
+            elif line.startswith("Steps:"):
+                header = "Steps:"
+                mode = "steps"
+            else:
+                header = None
+            if header is not None:
+                if strict:
+                    if header in seen:
+                        raise RecipeFormatError(f"line {number}: repeated {header} header")
+                    seen.add(header)
+                continue
 
-    results = []
-    for recipe in filtered_by_tags:
-        combined_text = (
+        if mode == "steps":
+            steps.append(line)
+        elif mode == "ingredients":
+            if line.startswith("- "):
+                # Only the leading marker; "- " inside an ingredient is kept
+                ingredient_line = line[2:].strip()
+                if ingredient_line:
+                    ingredients.append(ingredient_line)
+            elif strict:
+                raise RecipeFormatError(f"line {number}: ingredient lines start with \"- \"")
+        elif strict:
+            raise RecipeFormatError(f"line {number}: text outside a section")
+
+    is_valid = True
+    if not title or not description:
+        is_valid = False
+    if len(description) < 30:
+        is_valid = False
+    if not steps:
+        is_valid = False
+
+    return Recipe(
+        title=title, 
+        description=description, 
+        ingredients=ingredients, 
+        steps=steps,
+        tags=tags,
+        filename=file_path,
+        is_valid=is_valid
+    )
+
+def recipe_search_text(recipe):
+    """Lowercased title, description and ingredients, built once per Recipe."""
+    text = getattr(recipe, "_search_text", None)
+    if text is None:
+        text = (
             recipe.title.lower() + " " 
             + recipe.description.lower() + " " 
             + " ".join(recipe.ingredients).lower()
         )
+        recipe._search_text = text
+    return text
+
+def search_matcher(search_query, selected_tags=None):
+    """
+    Predicate (recipe -> bool) for a search query plus required tags.
+    Raises ValueError (query.QuerySyntaxError) for a malformed query.
+    """
+    mode, terms = parse_search_input(search_query)
+    tags = [t.lower() for t in (selected_tags or []) if t.strip()]
+
+    # Field scopes, parentheses and AND/OR/NOT go through the query language
+    import query
+    if query.is_advanced(search_query):
+        text_matches = query.parse_query(search_query).matches
+    elif mode == "NONE":
+        text_matches = lambda recipe: True
+    elif mode == "AND":
+        text_matches = lambda recipe: all(term in recipe_search_text(recipe) for term in terms)
+    elif mode == "OR":
+        text_matches = lambda recipe: any(term in recipe_search_text(recipe) for term in terms)
+    else:
+        phrase = terms[0]
+        text_matches = lambda recipe: phrase in recipe_search_text(recipe)
 
-        if mode == "AND":
-            if all(term in combined_text for term in terms):
-                results.append(recipe)
-        elif mode == "OR":
-            if any(term in combined_text for term in terms):
-                results.append(recipe)
-        elif mode == "PHRASE":
-            phrase = terms[0]
-            if phrase in combined_text:
-                results.append(recipe)
-    return results
+    def matches(recipe):
+        return all(t in recipe.tags for t in tags) and text_matches(recipe)
+    return matches
+
+def search_recipes(recipes, search_query, selected_tags=None):
+    """
+    Linear scan over `recipes`. catalog.CatalogSnapshot.search answers the
+    same queries through the index and query planner.
+    """
+    matches = search_matcher(search_query, selected_tags)
+    return [r for r in recipes if matches(r)]
+
+def batched(matches, batch_size=SEARCH_BATCH_SIZE, offset=0, limit=None):
+    """
+    Lists of up to `batch_size` items from the iterable `matches`, skipping
+    the first `offset` and stopping after `limit` in total. Items are pulled
+    only as the batches are consumed.
+    """
+    matches = itertools.islice(matches, offset, None if limit is None else offset + limit)
+    while True:
+        batch = list(itertools.islice(matches, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def iter_search_recipes(recipes, search_query, selected_tags=None,
+                        batch_size=SEARCH_BATCH_SIZE, offset=0, limit=None):
+    """
+    search_recipes delivered incrementally: yields lists of matches as the
+    scan finds them, so the first page is ready before the scan is done.
+    The query is parsed immediately, so a ValueError is raised here rather
+    than on the first next().
+    """
+    matches = search_matcher(search_query, selected_tags)
+    return batched((r for r in recipes if matches(r)), batch_size, offset, limit)
+
+def format_recipe_lines(title, description, ingredients, steps, tags=None):
+    """Serialize recipe fields into the lines of the .txt format."""
+    lines = []
+    lines.append(f"Title: {title}")
+    lines.append(f"Description: {description}")
+    if tags:
+        lines.append("Tags: " + ", ".join(tags))
+    else:
+        lines.append("Tags: ")
+    lines.append("Ingredients:")
+    for ing in ingredients:
+        ing_formatted = ing.strip().replace(" ", "_")
+        lines.append(f"- {ing_formatted}")
+    lines.append("Steps:")
+    for i, step in enumerate(steps, 1):
+        lines.append(f"{i}. {step}")
+    return lines
 
 def add_recipe(
     title, 
@@ -172,32 +463,34 @@ def add_recipe(
     if len(description) < 30:
         raise ValueError("Description must be at least 30 characters.")
 
-    file_name = title.lower().replace(" ", "_") + ".txt"
-    file_path = os.path.join(recipe_folder, file_name)
-
-    if not os.path.exists(recipe_folder):
-        os.makedirs(recipe_folder)
+    slug = recipe_slug(title)
 
     if tags is None:
         tags = []
 
-    lines = []
-    lines.append(f"Title: {title}")
-    lines.append(f"Description: {description}")
-    if tags:
-        lines.append("Tags: " + ", ".join(tags))
-    else:
-        lines.append("Tags: ")
-    lines.append("Ingredients:")
-    for ing in ingredients:
-        ing_formatted = ing.strip().replace(" ", "_")
-        lines.append(f"- {ing_formatted}")
-    lines.append("Steps:")
-    for i, step in enumerate(steps, 1):
-        lines.append(f"{i}. {step}")
+    lines = format_recipe_lines(title, description, ingredients, steps, tags)
+
+    if is_archive(recipe_folder):
+        import recipe_archive
+        try:
+            archive = recipe_archive.open_archive(recipe_folder)
+            key = archive.new_key(slug)
+            archive.put(key, "".join(line + "\n" for line in lines))
+            return f"{recipe_folder}::{key}"
+        except Exception as e:
+            print(f"Failed to append recipe to archive: {e}")
+            return None
+
+    if not os.path.exists(recipe_folder):
+        os.makedirs(recipe_folder)
+
+    target_folder = recipe_folder
+    if is_sharded(recipe_folder):
+        target_folder = os.path.join(recipe_folder, _shard_for(slug))
 
     try:
-        with open(file_path, "w", encoding="utf-8") as f:
+        file_path, f = _open_new_recipe_file(target_folder, slug)
+        with f:
             for line in lines:
                 f.write(line + "\n")
         print(f"Recipe saved at: {file_path}")  # Debug
@@ -207,26 +500,23 @@ def add_recipe(
         return None
 
 def update_recipe(recipe_obj, new_title, new_description, new_ingredients, new_steps, new_tags):
-    if not recipe_obj.filename:
+    if not recipe_obj.filename and not recipe_obj.archive:
         return False
 
     if len(new_description) < 30:
         raise ValueError("Description must be at least 30 characters.")
 
-    lines = []
-    lines.append(f"Title: {new_title}")
-    lines.append(f"Description: {new_description}")
-    if new_tags:
-        lines.append("Tags: " + ", ".join(new_tags))
-    else:
-        lines.append("Tags: ")
-    lines.append("Ingredients:")
-    for ing in new_ingredients:
-        ing_formatted = ing.strip().replace(" ", "_")
-        lines.append(f"- {ing_formatted}")
-    lines.append("Steps:")
-    for i, step in enumerate(new_steps, 1):
-        lines.append(f"{i}. {step}")
+    lines = format_recipe_lines(new_title, new_description, new_ingredients, new_steps, new_tags)
+
+    if recipe_obj.archive:
+        import recipe_archive
+        try:
+            archive = recipe_archive.open_archive(recipe_obj.archive)
+            archive.put(recipe_obj.archive_key, "".join(line + "\n" for line in lines))
+            return True
+        except Exception as e:
+            print(f"Failed to update archived recipe: {e}")
+            return False
 
     try:
         with open(recipe_obj.filename, "w", encoding="utf-8") as f:
@@ -238,6 +528,14 @@ def update_recipe(recipe_obj, new_title, new_description, new_ingredients, new_s
         return False
 
 def delete_recipe(recipe_obj):
+    if recipe_obj.archive:
+        import recipe_archive
+        try:
+            return recipe_archive.open_archive(recipe_obj.archive).delete(recipe_obj.archive_key)
+        except Exception as e:
+            print(f"Failed to delete {recipe_obj.archive_key} from archive: {e}")
+            return False
+
     if recipe_obj.filename and os.path.exists(recipe_obj.filename):
         try:
             os.remove(recipe_obj.filename)
@@ -247,6 +545,259 @@ def delete_recipe(recipe_obj):
             return False
     return False
 
+# --- batch operations -------------------------------------------------
+# Bulk delete/retag/export for many selected recipes at once. File I/O runs
+# on a thread pool and every file is replaced atomically (temp file + rename).
+# A batch either applies to every recipe or, if any one fails, is rolled
+# back; the previous contents are kept in a BatchJournal for a one-step undo.
+
+class BatchJournal:
+    """
+    Result of one batch: the previous and new bytes of every recipe it
+    changed (for undo_batch) and the changes to hand to the catalog in one
+    update.
+    """
+    def __init__(self, label):
+        self.label = label
+        # (recipe id, bytes before, bytes written); None where the recipe did not exist
+        self.entries = []
+        self.upserts = []  # Recipe objects as written
+        self.removed_ids = []
+        self.file_stats = {}  # path -> (mtime_ns, size) of written files
+        self.failed = []  # (recipe id, error message); non-empty means nothing was changed
+
+    def __len__(self):
+        return len(self.entries)
+
+    def record(self, rid, recipe, stat):
+        if recipe is None:
+            self.removed_ids.append(rid)
+        else:
+            self.upserts.append(recipe)
+            if stat is not None:
+                self.file_stats[rid] = stat
+
+def recipe_slug(title):
+    return title.lower().replace(" ", "_").replace("/", "_").replace("\\", "_")
+
+def _stored_recipe_bytes(rid):
+    """What is stored under `rid` right now, or None if nothing is."""
+    archive_path, _, key = rid.partition("::")
+    if key and is_archive(archive_path):
+        import recipe_archive
+        view = recipe_archive.open_archive(archive_path).get_bytes(key)
+        if view is None:
+            return None
+        with view:
+            return bytes(view)
+    try:
+        with open(rid, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def _read_recipe_bytes(recipe_obj):
+    if recipe_obj.archive:
+        import recipe_archive
+        view = recipe_archive.open_archive(recipe_obj.archive).get_bytes(recipe_obj.archive_key)
+        if view is None:
+            raise KeyError(f"{recipe_obj.archive_key} is not in the archive")
+        with view:
+            return bytes(view)
+    with open(recipe_obj.filename, "rb") as f:
+        return f.read()
+
+def _store_recipe_bytes(rid, data):
+    """
+    Replace the recipe stored under `rid` with `data` (.txt bytes), or delete
+    it if `data` is None. Returns (Recipe or None, file stat or None).
+    """
+    archive_path, _, key = rid.partition("::")
+    if key and is_archive(archive_path):
+        import recipe_archive
+        archive = recipe_archive.open_archive(archive_path)
+        if data is None:
+            archive.delete(key)
+            return None, None
+        text = data.decode("utf-8")
+        archive.put(key, text)
+        recipe = parse_recipe_bytes(data)
+        recipe.archive = archive_path
+        recipe.archive_key = key
+        return recipe, None
+
+    if data is None:
+        os.remove(rid)
+        return None, None
+    # The temp name must not end in .txt or a concurrent load would parse it
+    settings_manager.write_bytes_atomic(rid, data, suffix=".part")
+    st = os.stat(rid)
+    return parse_recipe_bytes(data, rid), (st.st_mtime_ns, st.st_size)
+
+def _run_batch(label, recipes, transform, max_workers=8):
+    """
+    Apply `transform` (previous bytes -> new bytes, or None to delete) to
+    every recipe. All recipes are read and transformed before anything is
+    written; if a read or a write fails, the writes already made are undone.
+    """
+    journal = BatchJournal(label)
+    ids = [recipe_id(r) for r in recipes]
+
+    def prepare(recipe_obj):
+        before = _read_recipe_bytes(recipe_obj)
+        return before, transform(before)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        planned = []
+        for rid, future in zip(ids, [pool.submit(prepare, r) for r in recipes]):
+            try:
+                before, after = future.result()
+            except Exception as e:
+                journal.failed.append((rid, str(e)))
+                continue
+            if after != before:
+                planned.append((rid, before, after))
+        if journal.failed:
+            return journal
+
+        futures = [pool.submit(_store_recipe_bytes, rid, after) for rid, _before, after in planned]
+        applied = []
+        for (rid, before, _after), future in zip(planned, futures):
+            try:
+                applied.append((rid, before, future.result()))
+            except Exception as e:
+                journal.failed.append((rid, str(e)))
+        if journal.failed:
+            rollback = [pool.submit(_store_recipe_bytes, rid, before) for rid, before, _ in applied]
+            for (rid, _before, _result), future in zip(applied, rollback):
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Failed to roll back {rid}: {e}")
+            return journal
+
+    after_by_id = {rid: after for rid, _before, after in planned}
+    for rid, before, (recipe, stat) in applied:
+        journal.entries.append((rid, before, after_by_id[rid]))
+        journal.record(rid, recipe, stat)
+    return journal
+
+def bulk_delete_recipes(recipes, max_workers=8):
+    """Delete `recipes` as one batch. Returns a BatchJournal."""
+    return _run_batch(f"Delete {len(recipes)} recipe(s)", recipes, lambda before: None, max_workers)
+
+def _retag_bytes(data, add_tags, remove_tags):
+    """Rewrite only the Tags: line of a recipe file, keeping every other byte."""
+    lines = data.decode("utf-8").splitlines(True)
+    # parse_recipe_bytes lets the last Tags: line win, so edit that one
+    tag_row = None
+    anchor = None
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith("Tags:"):
+            tag_row = i
+        elif stripped.startswith(("Title:", "Description:")):
+            anchor = i
+
+    old_tags = []
+    if tag_row is not None:
+        # Slice the prefix off, as parse_recipe_bytes does ("Tags: Tags: x" is the tag "tags: x")
+        tags_part = lines[tag_row].strip()[len("Tags:"):].strip()
+        old_tags = [tag.strip().lower() for tag in tags_part.split(',') if tag.strip()]
+    new_tags = [t for t in old_tags if t not in remove_tags]
+    new_tags += [t for t in add_tags if t not in new_tags and t not in remove_tags]
+    if new_tags == old_tags:
+        return data
+
+    if tag_row is not None:
+        line = lines[tag_row]
+        ending = line[len(line.rstrip("\r\n")):]
+        lines[tag_row] = "Tags: " + ", ".join(new_tags) + ending
+    else:
+        # No Tags: line yet; add one after the Description (or Title)
+        row = anchor if anchor is not None else -1
+        if row >= 0 and not lines[row].endswith("\n"):
+            lines[row] += "\n"
+        ending = "\r\n" if row >= 0 and lines[row].endswith("\r\n") else "\n"
+        lines.insert(row + 1, "Tags: " + ", ".join(new_tags) + ending)
+    return "".join(lines).encode("utf-8")
+
+def bulk_retag_recipes(recipes, add_tags=(), remove_tags=(), max_workers=8):
+    """Add and/or remove tags on `recipes` as one batch. Returns a BatchJournal."""
+    add_tags = [t.strip().lower() for t in add_tags if t.strip()]
+    remove_tags = {t.strip().lower() for t in remove_tags if t.strip()}
+    return _run_batch(
+        f"Retag {len(recipes)} recipe(s)", recipes,
+        lambda before: _retag_bytes(before, add_tags, remove_tags), max_workers
+    )
+
+def undo_batch(journal, max_workers=8):
+    """
+    Put back every recipe a batch changed. A recipe written again since the
+    batch (edited, re-added under the same name, ...) is left alone and
+    reported in `failed`. Returns a BatchJournal of the restored recipes for
+    the catalog update.
+    """
+    undo = BatchJournal(f"Undo {journal.label}")
+
+    def restore(rid, before, after):
+        if _stored_recipe_bytes(rid) != after:
+            raise ValueError("changed since the batch, not restored")
+        return _store_recipe_bytes(rid, before)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(restore, *entry) for entry in journal.entries]
+        for (rid, before, after), future in zip(journal.entries, futures):
+            try:
+                recipe, stat = future.result()
+            except Exception as e:
+                undo.failed.append((rid, str(e)))
+                continue
+            undo.entries.append((rid, after, before))
+            undo.record(rid, recipe, stat)
+    return undo
+
+def export_recipes(recipes, dest_folder, max_workers=8):
+    """
+    Copy `recipes` as .txt files into `dest_folder`, named after their titles
+    (pancakes.txt, pancakes_2.txt, ...). Returns (written paths, failed).
+    """
+    os.makedirs(dest_folder, exist_ok=True)
+    used = {name.lower() for name in os.listdir(dest_folder)}
+    targets = []
+    for recipe_obj in recipes:
+        slug = recipe_slug(recipe_obj.title) or "recipe"
+        name = f"{slug}.txt"
+        counter = 2
+        while name.lower() in used:
+            name = f"{slug}_{counter}.txt"
+            counter += 1
+        used.add(name.lower())
+        targets.append(os.path.join(dest_folder, name))
+
+    def export_one(recipe_obj, path):
+        settings_manager.write_bytes_atomic(path, _read_recipe_bytes(recipe_obj))
+        return path
+
+    written, failed = [], []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(export_one, r, p) for r, p in zip(recipes, targets)]
+        for recipe_obj, future in zip(recipes, futures):
+            try:
+                written.append(future.result())
+            except Exception as e:
+                failed.append((recipe_id(recipe_obj), str(e)))
+    return written, failed
+
+def build_shopping_list(recipes, scale=1.0):
+    """
+    Combine the ingredients of `recipes` into one shopping list of
+    (name, amount, unit) tuples. `scale` is a multiplier for every recipe or a
+    sequence with one multiplier per recipe. Requires NumPy.
+    """
+    import shopping_list
+    return shopping_list.IngredientTable(recipes).shopping_list(scale=scale)
+
 def validate_recipes(recipes):
     invalids = [r for r in recipes if not r.is_valid]
     return invalids
@@ -0,0 +1,362 @@
+# search_service.py
+#
+# Read-only HTTP/JSON search service over a recipe library, for kiosks,
+# label printers and scripts that should not each load the catalog:
+#
+#   python search_service.py --folder recipes --port 8765
+#
+#   GET /search?q=milk%2Begg&tag=breakfast&offset=0&limit=50   (q=milk+egg, URL-encoded)
+#   GET /tags
+#   GET /recipes/<id>          (id as returned by /search, URL-quoted)
+#   GET /generation
+#
+# Every response carries an ETag of the catalog generation; send it back in
+# If-None-Match to get a 304 while the catalog is unchanged.
+#
+# Connections are kept alive (HTTP/1.1), but workers are only busy while a
+# request is being read and answered: between requests a connection waits in
+# a selector, and connections idle for longer than --idle-timeout are closed.
+
+import sys
+import json
+import time
+import queue
+import socket
+import argparse
+import selectors
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, unquote
+
+import catalog
+import recipe_manager
+
+DEFAULT_PORT = 8765
+DEFAULT_LIMIT = 50
+DEFAULT_IDLE_TIMEOUT = 30.0
+
+
+def recipe_summary(recipe):
+    return {
+        "id": recipe_manager.recipe_id(recipe),
+        "title": recipe.title,
+        "tags": recipe.tags,
+        "is_valid": recipe.is_valid,
+    }
+
+
+def recipe_to_dict(recipe):
+    data = recipe_summary(recipe)
+    data.update({
+        "description": recipe.description,
+        "ingredients": recipe.ingredients,
+        "steps": recipe.steps,
+    })
+    return data
+
+
+class RecipeCatalogService:
+    """
+    The catalog and its indexes, loaded once and refreshed incrementally.
+    Request threads read the current catalog.CatalogSnapshot without locking;
+    refresh() publishes a new version with only the changed files re-parsed.
+    """
+    def __init__(self, recipe_folder="recipes"):
+        self.recipe_folder = recipe_folder
+        self.catalog = catalog.Catalog(recipe_folder)
+        self._stop = threading.Event()
+        self.catalog.load()
+
+    @property
+    def generation(self):
+        return self.catalog.snapshot.generation
+
+    def refresh(self):
+        """Pick up added, edited and removed recipes. Returns True if anything changed."""
+        before = self.catalog.snapshot
+        return self.catalog.refresh() is not before
+
+    def search(self, query, tags, offset=0, limit=DEFAULT_LIMIT):
+        snapshot = self.catalog.snapshot
+        results = snapshot.search(query, tags)
+        page = results[offset:offset + limit] if limit >= 0 else results[offset:]
+        return snapshot.generation, {
+            "generation": snapshot.generation,
+            "total": len(results),
+            "offset": offset,
+            "results": [recipe_summary(r) for r in page],
+        }
+
+    def tags(self):
+        snapshot = self.catalog.snapshot
+        counts = {t: len(snapshot.tag_index[t]) for t in snapshot.known_tags()}
+        return snapshot.generation, {"generation": snapshot.generation, "tags": counts}
+
+    def recipe(self, rid):
+        snapshot = self.catalog.snapshot
+        recipe = snapshot.recipes.get(rid)
+        return snapshot.generation, (recipe_to_dict(recipe) if recipe is not None else None)
+
+    def start_polling(self, interval=2.0):
+        """Refresh on a daemon thread every `interval` seconds."""
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Catalog refresh failed: {e}")
+
+        self._stop.clear()
+        threading.Thread(target=run, name="catalog-poller", daemon=True).start()
+
+    def stop_polling(self):
+        self._stop.set()
+
+
+class RecipeRequestHandler(BaseHTTPRequestHandler):
+    server_version = "AmbrosiaSearch/1.0"
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, keep-alive
+    # clients wait on delayed ACKs for every response
+    disable_nagle_algorithm = True
+    # A client that stops halfway through a request gives up its worker after this
+    timeout = 10
+
+    def log_message(self, format, *args):
+        # Quiet by default; kiosks poll often
+        pass
+
+    def do_GET(self):
+        service = self.server.service
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        path = url.path.rstrip("/") or "/"
+
+        # Answer conditional requests before doing any work; every endpoint's
+        # response is fully determined by the catalog generation
+        etag = f'"{service.generation}"'
+        known = path in ("/search", "/tags", "/generation") or path.startswith("/recipes/")
+        if known and self.headers.get("If-None-Match") == etag:
+            self.send_not_modified(etag)
+            return
+
+        try:
+            if path == "/search":
+                generation, body = service.search(
+                    params.get("q", [""])[0],
+                    params.get("tag", []),
+                    offset=max(0, int(params.get("offset", ["0"])[0])),
+                    limit=int(params.get("limit", [str(DEFAULT_LIMIT)])[0]),
+                )
+            elif path == "/tags":
+                generation, body = service.tags()
+            elif path.startswith("/recipes/"):
+                generation, body = service.recipe(unquote(path[len("/recipes/"):]))
+                if body is None:
+                    self.send_json(404, {"error": "recipe not found"}, generation)
+                    return
+            elif path == "/generation":
+                generation = service.generation
+                body = {"generation": generation}
+            else:
+                self.send_json(404, {"error": "unknown endpoint"}, None)
+                return
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)}, None)
+            return
+
+        etag = f'"{generation}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_not_modified(etag)
+            return
+        self.send_json(200, body, generation)
+
+    def send_not_modified(self, etag):
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def send_json(self, status, body, generation):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        if generation:
+            self.send_header("ETag", f'"{generation}"')
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class _Connection:
+    """One client connection and the request handler that serves it, request by request."""
+    def __init__(self, server, request, client_address):
+        self.request = request
+        self.client_address = client_address
+        self.last_active = time.monotonic()
+        # Set up once (socket timeout, buffered streams) instead of via
+        # __init__, which would serve the whole connection in one go
+        handler_class = server.RequestHandlerClass
+        self.handler = handler_class.__new__(handler_class)
+        self.handler.request = request
+        self.handler.client_address = client_address
+        self.handler.server = server
+        self.handler.setup()
+
+    def handle_one(self):
+        """Serve one request. Returns True if the connection stays open."""
+        self.handler.close_connection = True
+        self.handler.handle_one_request()
+        return not self.handler.close_connection
+
+    def has_buffered_request(self):
+        # Pipelined bytes may already sit in rfile's buffer, where the
+        # selector cannot see them
+        sock = self.handler.connection
+        sock.setblocking(False)
+        try:
+            return bool(self.handler.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            sock.settimeout(self.handler.timeout)
+
+    def close(self):
+        try:
+            self.handler.finish()
+        except OSError:
+            pass
+
+
+class ThreadPoolHTTPServer(HTTPServer):
+    """
+    HTTPServer that handles requests on a fixed-size thread pool. A
+    keep-alive connection is parked in a selector between requests, so idle
+    clients hold no worker; it is closed after `idle_timeout` seconds.
+    """
+    # socketserver's default listen backlog of 5 overflows under a burst of
+    # new connections, and the kernel then retries the SYN after a second
+    request_queue_size = 128
+
+    def __init__(self, address, handler, service, max_workers=8, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        super().__init__(address, handler)
+        self.service = service
+        self.idle_timeout = idle_timeout
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="search")
+        self._closing = False
+        self._selector = selectors.DefaultSelector()
+        # Workers hand connections back through a queue and wake the selector
+        self._returned = queue.SimpleQueue()
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._wake_send.setblocking(False)
+        self._selector.register(self._wake_recv, selectors.EVENT_READ)
+        self._parking = threading.Thread(target=self._park_connections, name="search-idle", daemon=True)
+        self._parking.start()
+
+    def process_request(self, request, client_address):
+        self._park(_Connection(self, request, client_address))
+
+    def _park(self, connection):
+        connection.last_active = time.monotonic()
+        self._returned.put(connection)
+        try:
+            self._wake_send.send(b"\0")
+        except OSError:
+            pass
+
+    def _park_connections(self):
+        last_sweep = time.monotonic()
+        while not self._closing:
+            for key, _events in self._selector.select(timeout=1.0):
+                if key.fileobj is self._wake_recv:
+                    try:
+                        self._wake_recv.recv(4096)
+                    except OSError:
+                        pass
+                    continue
+                self._selector.unregister(key.fileobj)
+                self.pool.submit(self._serve, key.data)
+            while True:
+                try:
+                    connection = self._returned.get_nowait()
+                except queue.Empty:
+                    break
+                self._selector.register(connection.request, selectors.EVENT_READ, connection)
+
+            now = time.monotonic()
+            if now - last_sweep >= 1.0:
+                last_sweep = now
+                for key in list(self._selector.get_map().values()):
+                    if key.data is not None and now - key.data.last_active > self.idle_timeout:
+                        self._selector.unregister(key.fileobj)
+                        self._close(key.data)
+
+        for key in list(self._selector.get_map().values()):
+            if key.data is not None:
+                self._close(key.data)
+        self._selector.close()
+
+    def _serve(self, connection):
+        try:
+            keep_alive = connection.handle_one()
+            while keep_alive and not self._closing and connection.has_buffered_request():
+                keep_alive = connection.handle_one()
+        except Exception:
+            self.handle_error(connection.request, connection.client_address)
+            keep_alive = False
+        if keep_alive and not self._closing:
+            self._park(connection)
+        else:
+            self._close(connection)
+
+    def _close(self, connection):
+        connection.close()
+        self.shutdown_request(connection.request)
+
+    def server_close(self):
+        super().server_close()
+        self._closing = True
+        try:
+            self._wake_send.send(b"\0")
+        except OSError:
+            pass
+        self._parking.join()
+        self._wake_send.close()
+        self._wake_recv.close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def make_server(recipe_folder="recipes", host="127.0.0.1", port=DEFAULT_PORT,
+                max_workers=8, poll_interval=2.0, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    service = RecipeCatalogService(recipe_folder)
+    if poll_interval > 0:
+        service.start_polling(poll_interval)
+    return ThreadPoolHTTPServer((host, port), RecipeRequestHandler, service, max_workers, idle_timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recipe search over local HTTP.")
+    parser.add_argument("--folder", default="recipes", help="recipe folder or .ambr archive")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--poll", type=float, default=2.0, help="seconds between catalog refreshes (0 = off)")
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help="seconds before an idle keep-alive connection is closed")
+    args = parser.parse_args()
+
+    server = make_server(args.folder, args.host, args.port, args.workers, args.poll, args.idle_timeout)
+    print(f"Serving {args.folder} on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.service.stop_polling()
+        server.server_close()
+
+if __name__ == "__main__":
+    sys.exit(main())
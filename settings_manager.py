@@ -2,16 +2,61 @@
 
 import os
 import json
+import tempfile
+import threading
 
 DEFAULT_SETTINGS = {
     "is_dark_mode": False,
     "font_family": "Arial",  # default to a sans font
     "font_size": 10,
     "font_bold": False,
-    "default_tags": ["breakfast", "lunch", "dinner", "dessert", "appetizer", "cocktail"]
+    "default_tags": ["breakfast", "lunch", "dinner", "dessert", "appetizer", "cocktail"],
+    # Event-loop stall monitor (see stall_monitor.py); reports are written on exit
+    "stall_monitor": False,
+    "stall_threshold_ms": 200,
+    # Recipe libraries searched together (see libraries.py); new recipes go
+    # to the first enabled one
+    "libraries": [{"name": "Recipes", "path": "recipes", "enabled": True}],
+    # Loaded but disabled libraries are unloaded when memory use passes this
+    "library_memory_limit_mb": 1024
 }
 
 SETTINGS_FILE = "settings.json"
+SESSION_FILE = "session.json"
+
+# How many result rows the session snapshot keeps for the warm start
+SESSION_SNAPSHOT_LIMIT = 2000
+
+DEFAULT_SESSION = {
+    "last_query": "",
+    "selected_tags": [],
+    "scroll_position": 0,
+    "current_id": None,
+    # Last displayed results, valid while the catalog generation is unchanged
+    "snapshot": None
+}
+
+def write_bytes_atomic(path, data, suffix=".part"):
+    """
+    Write `data` to a temp file in the same folder, then rename it over
+    `path`, so a crash never leaves a half-written file behind. The temp
+    file ends in `suffix`, so folder scans for other extensions skip it.
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=suffix, dir=folder)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_json_atomic(path, data):
+    write_bytes_atomic(path, json.dumps(data, indent=2).encode("utf-8"), suffix=".json")
 
 def load_settings():
     """
@@ -34,10 +79,62 @@ def load_settings():
 
 def save_settings(settings: dict):
     """
-    Save current settings to a JSON file.
+    Save current settings to a JSON file atomically.
+    Returns True on success.
     """
     try:
-        with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-            json.dump(settings, f, indent=2)
+        write_json_atomic(SETTINGS_FILE, settings)
+        return True
     except Exception as e:
         print(f"Error saving settings: {e}")
+        return False
+
+def load_session():
+    """
+    Load the last session state (query, tags, scroll, result snapshot).
+    A missing or unreadable file gives DEFAULT_SESSION.
+    """
+    merged = DEFAULT_SESSION.copy()
+    if os.path.exists(SESSION_FILE):
+        try:
+            with open(SESSION_FILE, "r", encoding="utf-8") as f:
+                merged.update(json.load(f))
+        except Exception as e:
+            print(f"Error loading session file: {e}")
+    return merged
+
+class SessionStore:
+    """
+    Holds the session state and writes it to SESSION_FILE atomically.
+    update() only records changes and calls `on_change`, which the GUI uses
+    to (re)start a single-shot timer; flush() writes pending changes. Writes
+    are serialized, so the newest state is always the one left on disk.
+    """
+    def __init__(self, state=None, path=None, on_change=None):
+        self.state = state if state is not None else load_session()
+        self.path = path or SESSION_FILE
+        self.on_change = on_change
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def update(self, **changes):
+        with self._lock:
+            self.state.update(changes)
+            self._dirty = True
+        if self.on_change is not None:
+            self.on_change()
+
+    def flush(self):
+        """Write pending changes now. Returns True if nothing failed."""
+        # Held through the write: a flush that read older state can never
+        # finish after one that read newer state
+        with self._lock:
+            if not self._dirty:
+                return True
+            try:
+                write_json_atomic(self.path, self.state)
+            except Exception as e:
+                print(f"Error saving session: {e}")
+                return False
+            self._dirty = False
+            return True
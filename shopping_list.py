@@ -0,0 +1,190 @@
+# shopping_list.py
+
+import re
+
+try:
+    import numpy as np
+except ImportError:  # shopping lists are optional; the rest of the app works without NumPy
+    np = None
+
+UNICODE_FRACTIONS = {
+    "¼": 0.25, "½": 0.5, "¾": 0.75, "⅓": 1 / 3, "⅔": 2 / 3,
+    "⅛": 0.125, "⅜": 0.375, "⅝": 0.625, "⅞": 0.875,
+}
+
+# Base units every quantity is converted to before summing
+BASE_UNITS = ["", "g", "ml", "pinch", "clove", "slice", "can"]
+
+# alias -> (base unit, factor to the base unit)
+UNIT_ALIASES = {
+    "g": ("g", 1.0), "gram": ("g", 1.0), "grams": ("g", 1.0),
+    "kg": ("g", 1000.0), "kilogram": ("g", 1000.0), "kilograms": ("g", 1000.0),
+    "oz": ("g", 28.3495), "ounce": ("g", 28.3495), "ounces": ("g", 28.3495),
+    "lb": ("g", 453.592), "lbs": ("g", 453.592), "pound": ("g", 453.592), "pounds": ("g", 453.592),
+    "ml": ("ml", 1.0), "milliliter": ("ml", 1.0), "milliliters": ("ml", 1.0),
+    "l": ("ml", 1000.0), "liter": ("ml", 1000.0), "liters": ("ml", 1000.0),
+    "litre": ("ml", 1000.0), "litres": ("ml", 1000.0),
+    "tsp": ("ml", 4.92892), "teaspoon": ("ml", 4.92892), "teaspoons": ("ml", 4.92892),
+    "tbsp": ("ml", 14.7868), "tablespoon": ("ml", 14.7868), "tablespoons": ("ml", 14.7868),
+    "cup": ("ml", 236.588), "cups": ("ml", 236.588),
+    "pint": ("ml", 473.176), "pints": ("ml", 473.176),
+    "pinch": ("pinch", 1.0), "pinches": ("pinch", 1.0),
+    "clove": ("clove", 1.0), "cloves": ("clove", 1.0),
+    "slice": ("slice", 1.0), "slices": ("slice", 1.0),
+    "can": ("can", 1.0), "cans": ("can", 1.0),
+}
+
+# Larger display unit used once a summed base amount reaches the threshold
+DISPLAY_UNITS = {"g": ("kg", 1000.0), "ml": ("l", 1000.0)}
+
+_QUANTITY_RE = re.compile(
+    r"""^\s*
+    (?:(?P<whole>\d+(?:\.\d+)?)(?=[\sA-Za-z¼½¾⅓⅔⅛⅜⅝⅞]|$)\s*)?
+    (?:(?P<num>\d+)\s*/\s*(?P<den>\d+)\s*)?
+    (?P<uni>[¼½¾⅓⅔⅛⅜⅝⅞])?
+    \s*(?P<rest>.*)$""",
+    re.VERBOSE,
+)
+
+
+def parse_quantity(ingredient):
+    """
+    Split an ingredient line such as "1 1/2 cups flour" (or "1_1/2_cups_flour",
+    as stored in recipe files) into (amount, unit, name). `amount` is in the
+    unit as written and None when the line has no leading amount; `unit` is ""
+    for plain counts.
+    """
+    text = " ".join(ingredient.replace("_", " ").split())
+    match = _QUANTITY_RE.match(text)
+    amount = None
+    if match.group("whole"):
+        amount = float(match.group("whole"))
+    if match.group("num"):
+        den = float(match.group("den"))
+        if den:
+            amount = (amount or 0.0) + float(match.group("num")) / den
+    if match.group("uni"):
+        amount = (amount or 0.0) + UNICODE_FRACTIONS[match.group("uni")]
+    rest = match.group("rest")
+
+    unit = ""
+    if amount is not None:
+        head, _, tail = rest.partition(" ")
+        alias = head.lower().rstrip(".")
+        if alias in UNIT_ALIASES and tail:
+            unit = alias
+            rest = tail
+    if rest.lower().startswith("of "):
+        rest = rest[3:]
+    return amount, unit, rest.strip().lower()
+
+
+class IngredientTable:
+    """
+    Parsed ingredient quantities for a list of recipes, stored as parallel
+    NumPy columns (one row per ingredient line):
+      recipe_ids     index into `recipes`
+      ingredient_ids index into `ingredient_names`
+      unit_ids       index into BASE_UNITS
+      amounts        amount in the base unit, NaN when the line has no amount
+    Scaling, unit conversion and summing are whole-column operations.
+    """
+    def __init__(self, recipes):
+        if np is None:
+            raise RuntimeError("NumPy is required for shopping lists (pip install numpy).")
+        self.recipes = list(recipes)
+        self.ingredient_names = []
+        self.unit_names = BASE_UNITS
+
+        name_ids = {}
+        unit_ids = {u: i for i, u in enumerate(BASE_UNITS)}
+        parsed_cache = {}
+        recipe_col, ingredient_col, unit_col, amount_col = [], [], [], []
+
+        for recipe_index, recipe in enumerate(self.recipes):
+            for line in recipe.ingredients:
+                parsed = parsed_cache.get(line)
+                if parsed is None:
+                    amount, unit, name = parse_quantity(line)
+                    base, factor = UNIT_ALIASES.get(unit, ("", 1.0))
+                    if name not in name_ids:
+                        name_ids[name] = len(self.ingredient_names)
+                        self.ingredient_names.append(name)
+                    parsed = (
+                        name_ids[name],
+                        unit_ids[base],
+                        amount * factor if amount is not None else float("nan"),
+                    )
+                    parsed_cache[line] = parsed
+                recipe_col.append(recipe_index)
+                ingredient_col.append(parsed[0])
+                unit_col.append(parsed[1])
+                amount_col.append(parsed[2])
+
+        self.recipe_ids = np.array(recipe_col, dtype=np.int32)
+        self.ingredient_ids = np.array(ingredient_col, dtype=np.int32)
+        self.unit_ids = np.array(unit_col, dtype=np.int8)
+        self.amounts = np.array(amount_col, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def scaled_amounts(self, scale=1.0):
+        """Amounts multiplied by a scalar or by one factor per recipe (e.g. servings ratio)."""
+        factors = np.asarray(scale, dtype=np.float64)
+        if factors.ndim == 0:
+            return self.amounts * factors
+        return self.amounts * factors[self.recipe_ids]
+
+    def shopping_list(self, scale=1.0, recipe_indices=None):
+        """
+        Sum the quantities of every ingredient across the recipes (all, or
+        just `recipe_indices`) in one group-by over (ingredient, unit).
+        Returns a list of (name, amount, unit) sorted by name; amount is None
+        for ingredients that never had a quantity.
+        """
+        amounts = self.scaled_amounts(scale)
+        ingredient_ids = self.ingredient_ids
+        unit_ids = self.unit_ids
+        if recipe_indices is not None:
+            mask = np.isin(self.recipe_ids, np.asarray(recipe_indices, dtype=np.int32))
+            amounts = amounts[mask]
+            ingredient_ids = ingredient_ids[mask]
+            unit_ids = unit_ids[mask]
+        if not len(amounts):
+            # np.bincount of nothing is an int64 array, which the unit promotion cannot divide
+            return []
+
+        keys = ingredient_ids.astype(np.int64) * len(self.unit_names) + unit_ids
+        groups, inverse = np.unique(keys, return_inverse=True)
+        quantified = ~np.isnan(amounts)
+        totals = np.bincount(inverse, weights=np.where(quantified, amounts, 0.0), minlength=len(groups))
+        counted = np.bincount(inverse, weights=quantified, minlength=len(groups)) > 0
+
+        group_units = groups % len(self.unit_names)
+        display_totals = totals.copy()
+        display_units = [self.unit_names[u] for u in group_units]
+        for base, (bigger, factor) in DISPLAY_UNITS.items():
+            promote = (group_units == self.unit_names.index(base)) & (totals >= factor)
+            display_totals[promote] /= factor
+            for i in np.flatnonzero(promote):
+                display_units[i] = bigger
+
+        items = []
+        for i, key in enumerate(groups):
+            name = self.ingredient_names[key // len(self.unit_names)]
+            amount = round(float(display_totals[i]), 2) if counted[i] else None
+            items.append((name, amount, display_units[i]))
+        items.sort(key=lambda item: (item[0], item[2]))
+        return items
+
+
+def format_shopping_list(items):
+    lines = []
+    for name, amount, unit in items:
+        if amount is None:
+            lines.append(f"- {name}")
+        else:
+            quantity = f"{amount:g} {unit}".strip()
+            lines.append(f"- {quantity} {name}")
+    return "\n".join(lines)
@@ -0,0 +1,186 @@
+# stall_monitor.py
+#
+# Opt-in responsiveness monitor for the Qt event loop. Enable it with
+# "stall_monitor": true in settings.json or AMBROSIA_STALL_MONITOR=1.
+#
+# A heartbeat QTimer on the main thread measures how late each tick is
+# dispatched. A watchdog thread notices when the heartbeat has gone silent
+# and samples the main thread's Python stack (sys._current_frames) until it
+# beats again; silences longer than the threshold are recorded as stalls.
+# Samples are aggregated per stall and overall; report() gives JSON-ready
+# data and collapsed_stacks() the "frame;frame;frame count" format used by
+# flame graph tools.
+
+import os
+import sys
+import json
+import time
+import threading
+from collections import Counter
+
+from PySide6.QtCore import QObject, QTimer
+
+REPORT_JSON = "stall_report.json"
+REPORT_FOLDED = "stall_report.folded"
+
+# Frames from modules in the app folder are reported as the cause of a stall
+APP_FOLDER = os.path.dirname(os.path.abspath(__file__))
+MAX_STALLS_KEPT = 200
+
+
+def _frame_label(frame):
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}"
+
+
+def _is_app_frame(frame):
+    return os.path.dirname(os.path.abspath(frame.f_code.co_filename)) == APP_FOLDER
+
+
+def sample_stack(frame):
+    """
+    (collapsed stack, innermost app frame) for a frame, outermost first.
+    The app frame is "file.py:function:line", or None if no app code is on the stack.
+    """
+    labels = []
+    culprit = None
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        if culprit is None and _is_app_frame(frame) and frame.f_code.co_filename != __file__:
+            culprit = f"{_frame_label(frame)}:{frame.f_lineno}"
+        frame = frame.f_back
+    return ";".join(reversed(labels)), culprit
+
+
+class StallMonitor(QObject):
+    """
+    Heartbeat plus watchdog. Create and start() it on the GUI thread; call
+    stop() before exit, then report() / write_reports().
+    """
+    def __init__(self, threshold_ms=200, interval_ms=50, sample_ms=10, parent=None):
+        super().__init__(parent)
+        self.threshold = threshold_ms / 1000.0
+        self.interval = interval_ms / 1000.0
+        self.sample_interval = sample_ms / 1000.0
+        self.main_thread_id = threading.get_ident()
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._last_beat = None
+        self._current = None  # samples of the stall in progress
+        self.ticks = 0
+        self.max_latency = 0.0
+        self.latency_buckets = Counter()  # dispatch latency in ms, rounded up to a power of two
+        self.stalls = []  # the last MAX_STALLS_KEPT, in detail
+        self.stall_count = 0
+        self.stalled_ms = 0.0
+        self.stacks = Counter()
+        self.culprits = Counter()
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._beat)
+        self._watchdog = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+
+    def start(self):
+        self._last_beat = time.perf_counter()
+        self._timer.start()
+        self._watchdog.start()
+
+    def stop(self):
+        self._timer.stop()
+        self._stop.set()
+        if self._watchdog.is_alive():
+            self._watchdog.join()
+        # A stall still in progress at exit is kept as well
+        self._beat(final=True)
+
+    def _beat(self, final=False):
+        now = time.perf_counter()
+        with self._lock:
+            if not final:
+                latency = max(0.0, now - self._last_beat - self.interval)
+                self.ticks += 1
+                self.max_latency = max(self.max_latency, latency)
+                bucket = 1
+                while bucket < latency * 1000:
+                    bucket *= 2
+                self.latency_buckets[bucket] += 1
+            self._last_beat = now
+            current, self._current = self._current, None
+        if current is not None and now - current["start"] - self.interval >= self.threshold:
+            self._finish_stall(current, now)
+
+    def _finish_stall(self, current, now):
+        culprits = Counter(c for _stack, c in current["samples"] if c)
+        stall = {
+            "started": current["started"],
+            "duration_ms": round((now - current["start"] - self.interval) * 1000, 1),
+            "samples": len(current["samples"]),
+            "top_frames": [{"frame": f, "samples": n} for f, n in culprits.most_common(5)],
+        }
+        with self._lock:
+            self.stall_count += 1
+            self.stalled_ms += stall["duration_ms"]
+            self.stalls.append(stall)
+            del self.stalls[:-MAX_STALLS_KEPT]
+            for stack, culprit in current["samples"]:
+                self.stacks[stack] += 1
+                if culprit:
+                    self.culprits[culprit] += 1
+
+    def _watch(self):
+        while not self._stop.wait(self.sample_interval):
+            now = time.perf_counter()
+            with self._lock:
+                silent = now - self._last_beat - self.interval
+                # Start sampling early so the beginning of a stall is covered;
+                # _beat drops it if it ends up under the threshold
+                if silent < self.threshold / 2:
+                    continue
+                if self._current is None:
+                    self._current = {
+                        "start": self._last_beat,
+                        "started": time.strftime("%Y-%m-%d %H:%M:%S"),
+                        "samples": [],
+                    }
+                current = self._current
+            frame = sys._current_frames().get(self.main_thread_id)
+            if frame is None:
+                continue
+            sample = sample_stack(frame)
+            del frame
+            with self._lock:
+                # The heartbeat may have ended this stall while we sampled
+                if self._current is current:
+                    current["samples"].append(sample)
+
+    def report(self):
+        with self._lock:
+            return {
+                "threshold_ms": self.threshold * 1000,
+                "heartbeat_ms": self.interval * 1000,
+                "ticks": self.ticks,
+                "max_latency_ms": round(self.max_latency * 1000, 1),
+                "latency_histogram_ms": {f"<={b}": n for b, n in sorted(self.latency_buckets.items())},
+                "stall_count": self.stall_count,
+                "stalled_ms": round(self.stalled_ms, 1),
+                "top_frames": [{"frame": f, "samples": n} for f, n in self.culprits.most_common(20)],
+                "stalls": list(self.stalls),
+            }
+
+    def collapsed_stacks(self):
+        with self._lock:
+            return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+    def write_reports(self, json_path=REPORT_JSON, folded_path=REPORT_FOLDED):
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        with open(folded_path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed_stacks())
+
+
+def is_enabled(settings):
+    env = os.environ.get("AMBROSIA_STALL_MONITOR")
+    if env is not None:
+        return env.strip().lower() not in ("", "0", "false", "no", "off")
+    return bool(settings.get("stall_monitor", False))